@@ -33,18 +33,21 @@ __all__ = [
     "AbstractConnectionPool",
     "Connection",
     "ConnectionPool",
+    "PreparedStatement",
     "ServerInfo",
     "connect",
 ]
 
 
 from collections import deque
+from io import BytesIO
 from logging import getLogger
 from select import select
 from socket import socket, SOL_SOCKET, SO_KEEPALIVE, SHUT_RDWR, \
     timeout as SocketTimeout, AF_INET, AF_INET6
 from ssl import HAS_SNI, SSLSocket, SSLError
-from struct import pack as struct_pack, unpack as struct_unpack
+from struct import pack as struct_pack, pack_into as struct_pack_into, \
+    unpack as struct_unpack
 from threading import RLock, Condition
 from time import perf_counter
 
@@ -54,7 +57,7 @@ from neobolt.exceptions import ClientError, ProtocolError, SecurityError, \
     ConnectionExpired, DatabaseUnavailableError, NotALeaderError, \
     ForbiddenOnReadOnlyDatabaseError
 from neobolt.meta import get_user_agent
-from neobolt.packstream import Packer, Unpacker, UnpackableBuffer
+from neobolt.packstream import Packer, StringCache, Unpacker, UnpackableBuffer
 from neobolt.security import make_ssl_context
 
 
@@ -70,6 +73,29 @@ DEFAULT_KEEP_ALIVE = True
 
 # Connection Settings
 DEFAULT_CONNECTION_ACQUISITION_TIMEOUT = 60  # 1m
+DEFAULT_STRING_CACHE_SIZE = 256
+DEFAULT_PRESIZE_MESSAGES = False
+DEFAULT_INTERN_CAPACITY = 1024
+DEFAULT_NUMERIC_LISTS = None
+DEFAULT_BYTES_VIEWS = False
+DEFAULT_READ_TIMEOUT = None
+DEFAULT_REFERENCE_THRESHOLD = 65536
+DEFAULT_RECEIVE_BUFFER_SIZE = None
+
+# Smallest fixed receive buffer that can hold a full chunk along with
+# its own header and the header of the chunk that follows
+MIN_RECEIVE_BUFFER_SIZE = 2 + 0xFFFF + 2
+
+# Maximum number of buffers passed to a single sendmsg call
+IOV_MAX = 1024
+
+# Pre-encoded messages that carry no fields
+GOODBYE = b"\xB0\x02"
+RESET = b"\xB0\x0F"
+COMMIT = b"\xB0\x12"
+ROLLBACK = b"\xB0\x13"
+DISCARD_ALL = b"\xB0\x2F"
+PULL_ALL = b"\xB0\x3F"
 
 
 # Set up logger
@@ -119,70 +145,283 @@ class ServerInfo(object):
         return tuple(value)
 
 
+class PreparedStatement(object):
+    """ A RUN message for which everything except the parameter map has
+    been packed in advance. Prepared statements are created through
+    :meth:`.Connection.prepare` and can be run any number of times, on
+    any connection, with :meth:`.Connection.run_prepared`.
+    """
+
+    def __init__(self, statement, extra):
+        self.statement = statement
+        self.extra = extra
+        stream = BytesIO()
+        packer = Packer(stream)
+        packer.pack_raw(b"\xB3\x10")  # RUN, with three fields
+        packer.pack(statement)
+        self.head = stream.getvalue()
+        stream = BytesIO()
+        Packer(stream).pack(extra)
+        self.tail = stream.getvalue()
+
+    def __repr__(self):
+        return "<%s statement=%r extra=%r>" % (self.__class__.__name__, self.statement, self.extra)
+
+
 class Outbox(object):
+    """ Chunked output buffer for outgoing messages.
+
+    Data may be written either as byte strings, via :meth:`.write`, or
+    packed in place with a precompiled :class:`struct.Struct`, via
+    :meth:`.pack_into`. The header for each chunk is only filled in once
+    that chunk is closed, or when the buffer is viewed for sending.
+
+    Byte strings of at least `reference_threshold` bytes are referenced
+    rather than copied into the buffer, and can be sent along with the
+    buffered data by scatter-gather I/O, using the list of
+    :meth:`.buffers`. Only immutable :class:`bytes` objects are
+    referenced; mutable buffers, such as a `bytearray`, are always copied
+    so that the caller remains free to change them.
+
+    The buffer grows as required, and is reused after each
+    :meth:`.clear`. Every `shrink_interval` clears, it is shrunk back to
+    the largest amount of data held during that interval (but never
+    below its initial `capacity`) if it has grown to more than twice
+    that size, so that the memory taken by an occasional large message
+    is given back.
+    """
 
-    def __init__(self, capacity=8192, max_chunk_size=16384):
+    def __init__(self, capacity=8192, max_chunk_size=16384, reference_threshold=None,
+                 shrink_interval=64):
+        self._capacity = capacity
         self._max_chunk_size = max_chunk_size
+        self._reference_threshold = reference_threshold
+        self._shrink_interval = shrink_interval
         self._header = 0
         self._start = 2
         self._end = 2
         self._data = bytearray(capacity)
+        # Referenced payloads, as (offset, memoryview) pairs, along with
+        # the number of referenced bytes in the current chunk
+        self._references = []
+        self._referenced = 0
+        # Clears and high-water mark within the current shrink interval
+        self._clears = 0
+        self._high_water = 0
+        #: Number of times the data has been taken for sending
+        self.flush_count = 0
+        #: Number of bytes copied while preparing data for sending
+        self.flush_copied_bytes = 0
 
     def max_chunk_size(self):
         return self._max_chunk_size
 
+    @property
+    def reference_count(self):
+        """ Number of referenced payload slices awaiting sending.
+        """
+        return len(self._references)
+
     def clear(self):
+        self._high_water = max(self._high_water, self._end)
+        self._clears += 1
+        if self._clears >= self._shrink_interval:
+            size = max(self._high_water, self._capacity)
+            if len(self._data) > 2 * size:
+                # Replace rather than resize, in case the data is still
+                # being viewed
+                self._data = bytearray(size)
+            self._clears = 0
+            self._high_water = 0
         self._header = 0
         self._start = 2
         self._end = 2
         self._data[0:2] = b"\x00\x00"
+        self._references = []
+        self._referenced = 0
 
     def write(self, b):
         to_write = len(b)
+        threshold = self._reference_threshold
+        reference = threshold is not None and to_write >= threshold and isinstance(b, bytes)
+        if reference:
+            b = memoryview(b)
         max_chunk_size = self._max_chunk_size
         pos = 0
         while to_write > 0:
-            chunk_size = self._end - self._start
+            chunk_size = self._end - self._start + self._referenced
             remaining = max_chunk_size - chunk_size
             if remaining == 0 or remaining < to_write <= max_chunk_size:
                 self.chunk()
             else:
                 wrote = min(to_write, remaining)
-                new_end = self._end + wrote
-                self._data[self._end:new_end] = b[pos:pos+wrote]
-                self._end = new_end
+                if reference:
+                    self._references.append((self._end, b[pos:pos+wrote]))
+                    self._referenced += wrote
+                else:
+                    new_end = self._end + wrote
+                    self._data[self._end:new_end] = b[pos:pos+wrote]
+                    self._end = new_end
                 pos += wrote
-                new_chunk_size = self._end - self._start
-                self._data[self._header:(self._header + 2)] = struct_pack(">H", new_chunk_size)
                 to_write -= wrote
 
+    def buffered_size(self, size):
+        """ Return the number of bytes that a :class:`bytes` payload of
+        `size` bytes takes up in the buffer when written: the payload
+        itself, or just the headers of the chunks that it spans if it is
+        referenced.
+        """
+        threshold = self._reference_threshold
+        if threshold is not None and size >= threshold:
+            return 2 * (size // self._max_chunk_size + 1)
+        else:
+            return size
+
+    def ensure_capacity(self, size):
+        """ Grow the buffer, if necessary, so that a further `size` bytes of
+        data, along with the headers of the chunks it will be split into,
+        can be written without the buffer having to grow again.
+        """
+        chunk_count = size // self._max_chunk_size + 2
+        required = self._end + size + 2 * chunk_count
+        data = self._data
+        if required > len(data):
+            data += bytes(required - len(data))
+
+    def reserve(self, size):
+        """ Reserve `size` contiguous bytes within the current chunk,
+        starting a new chunk if the current one does not have enough room,
+        and return the offset of the reserved space.
+        """
+        if self._max_chunk_size - (self._end - self._start + self._referenced) < size:
+            self.chunk()
+        offset = self._end
+        new_end = offset + size
+        data = self._data
+        if new_end > len(data):
+            data += bytes(max(new_end - len(data), len(data)))
+        self._end = new_end
+        return offset
+
+    def mark(self):
+        """ Return the current write position, so that anything written
+        after it can later be discarded by :meth:`.rewind`.
+        """
+        return self._header, self._start, self._end, len(self._references), self._referenced
+
+    def rewind(self, mark):
+        """ Discard everything written since a position returned by
+        :meth:`.mark`.
+        """
+        self._header, self._start, self._end, reference_count, self._referenced = mark
+        del self._references[reference_count:]
+
+    def pack_into(self, s, *values):
+        """ Pack values directly into the buffer using a precompiled
+        :class:`struct.Struct`.
+        """
+        s.pack_into(self._data, self.reserve(s.size), *values)
+
+    def _close_chunk(self):
+        struct_pack_into(">H", self._data, self._header,
+                         self._end - self._start + self._referenced)
+
     def chunk(self):
+        self._close_chunk()
         self._header = self._end
         self._start = self._header + 2
         self._end = self._start
+        self._referenced = 0
         self._data[self._header:self._start] = b"\x00\x00"
 
-    def view(self):
-        end = self._end
-        chunk_size = end - self._start
-        if chunk_size == 0:
-            return memoryview(self._data[:self._header])
+    def _data_end(self):
+        """ Close any open chunk that holds data, and return the end of
+        the data ready for sending.
+        """
+        if self._end - self._start + self._referenced == 0:
+            return self._header
         else:
-            return memoryview(self._data[:end])
+            self._close_chunk()
+            return self._end
+
+    def view(self):
+        """ Return the data ready for sending as a single memoryview. This
+        is a view onto the buffer itself, unless payloads have been
+        referenced, in which case everything is joined into a copy.
+
+        The view should be released once it has been sent, as the buffer
+        cannot grow while it is being viewed.
+        """
+        if self._references:
+            data = b"".join(self.buffers())
+            self.flush_copied_bytes += len(data)
+            return memoryview(data)
+        self.flush_count += 1
+        return memoryview(self._data)[:self._data_end()]
+
+    def buffers(self):
+        """ Return the data ready for sending as a list of memoryviews,
+        interleaving slices of the buffer with any referenced payloads.
+        """
+        self.flush_count += 1
+        end = self._data_end()
+        data = memoryview(self._data)
+        buffers = []
+        p = 0
+        for offset, payload in self._references:
+            if offset > p:
+                buffers.append(data[p:offset])
+                p = offset
+            buffers.append(payload)
+        if end > p:
+            buffers.append(data[p:end])
+        return buffers
 
 
 class BufferedSocket(object):
     """ Wrapper for a regular socket, with an added a dynamically-resizing
     receive buffer to reduce the number of calls to recv.
 
+    Data is received with plain blocking calls to `recv_into`. If a
+    `read_timeout` is given, it is applied to the socket, so that a
+    server which stops responding raises :class:`socket.timeout` rather
+    than stalling forever; note that the same timeout then also applies
+    to sending.
+
+    If `fixed` is true, the buffer keeps its initial capacity, which
+    must be at least :const:`.MIN_RECEIVE_BUFFER_SIZE`, for its whole
+    life. Unread data is moved to the front to make room, and no more
+    than the buffer can hold is ever read ahead, so that a consumer that
+    falls behind leaves data in the network stack, where TCP flow
+    control throttles the server.
+
     NOTE: not all socket methods are implemented yet
     """
 
-    def __init__(self, socket_, initial_capacity=0):
+    def __init__(self, socket_, initial_capacity=0, read_timeout=None, fixed=False):
+        if fixed and initial_capacity < MIN_RECEIVE_BUFFER_SIZE:
+            raise ValueError("A fixed receive buffer must hold at least "
+                             "%d bytes" % MIN_RECEIVE_BUFFER_SIZE)
         self.socket = socket_
+        self.fixed = fixed
         self.buffer = bytearray(initial_capacity)
         self.r_pos = 0
         self.w_pos = 0
+        if read_timeout is not None:
+            socket_.settimeout(read_timeout)
+        #: Number of calls made to `recv_into` on the socket
+        self.recv_count = 0
+        #: Number of bytes received from the socket
+        self.recv_bytes = 0
+
+    @property
+    def bytes_per_recv(self):
+        """ Mean number of bytes received per call to `recv_into`.
+        """
+        if self.recv_count:
+            return self.recv_bytes / self.recv_count
+        else:
+            return 0.0
 
     def _fill_buffer(self, min_bytes):
         """ Fill the buffer with at least `min_bytes` bytes, requesting more if
@@ -216,6 +455,10 @@ class BufferedSocket(object):
             # and appending empty space big enough to hold the minimum number
             # of bytes we're looking for.
             #
+            if self.fixed:
+                raise ProtocolError("Cannot receive {} bytes into a fixed buffer "
+                                    "of {} bytes".format(self.w_pos - self.r_pos + min_bytes,
+                                                         len(self.buffer)))
             # print("Rebuilding buffer from {} bytes ({} used) to "
             #       "{} bytes".format(len(self.buffer),
             #                         self.w_pos - self.r_pos,
@@ -226,15 +469,34 @@ class BufferedSocket(object):
             self.r_pos = 0
         min_end = self.w_pos + min_bytes
         end = len(self.buffer)
-        view = memoryview(self.buffer)
-        self.socket.setblocking(0)
-        while self.w_pos < min_end:
-            ready_to_read, _, _ = select([self.socket], [], [])
-            subview = view[self.w_pos:end]
-            n = self.socket.recv_into(subview, end - self.w_pos)
-            if n == 0:
-                raise OSError("No data")
-            self.w_pos += n
+        recv_into = self.socket.recv_into
+        with memoryview(self.buffer) as view:
+            while self.w_pos < min_end:
+                n = recv_into(view[self.w_pos:end], end - self.w_pos)
+                self.recv_count += 1
+                if n == 0:
+                    raise OSError("No data")
+                self.recv_bytes += n
+                self.w_pos += n
+
+    def fill(self, n_bytes):
+        """ Ensure that at least `n_bytes` bytes of unread data are held in
+        the buffer, receiving more if necessary.
+        """
+        required = n_bytes - (self.w_pos - self.r_pos)
+        if required > 0:
+            self._fill_buffer(required)
+
+    def detach(self):
+        """ Move any unread data into fresh storage, leaving the current
+        buffer untouched for views that have been taken onto it.
+        """
+        size = self.w_pos - self.r_pos
+        buffer = bytearray(max(len(self.buffer), size))
+        buffer[:size] = self.buffer[self.r_pos:self.w_pos]
+        self.buffer = buffer
+        self.r_pos = 0
+        self.w_pos = size
 
     def recv_into(self, buffer, n_bytes=0, flags=0):
         """ Intercepts a regular socket.recv_into call, taking data from the
@@ -263,16 +525,52 @@ class BufferedSocket(object):
 
 class Inbox(object):
 
-    def __init__(self, s, on_error):
+    #: Whether RECORD messages are decoded lazily, as LazyRecords
+    lazy_records = False
+
+    #: Functions by structure tag, used to hydrate the values of RECORD
+    #: messages as they are decoded
+    hydration_functions = None
+
+    #: Callable returning the indexes of the fields to decode from each
+    #: RECORD message, or :const:`None` to decode all fields
+    resolve_projection = None
+
+    def __init__(self, s, on_error, **unpacker_config):
         super(Inbox, self).__init__()
         self.on_error = on_error
+        self.unpacker_config = unpacker_config
+        self._socket = s
+        # Built up front, so that bad settings are rejected straight away
+        self._buffer = UnpackableBuffer()
+        self._unpacker = Unpacker(self._buffer, **unpacker_config)
         self._messages = self._yield_messages(s)
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        return next(self._messages)
+        message = next(self._messages)
+        if isinstance(message, Exception):
+            # Raised here rather than within the generator, so that the
+            # rest of the stream can still be read
+            raise message
+        return message
+
+    def message_available(self):
+        """ Check whether the next message has already been received in
+        full, and can therefore be read without waiting.
+        """
+        sock = self._socket
+        data = sock.buffer
+        p = sock.r_pos
+        end = sock.w_pos
+        while p + 2 <= end:
+            chunk_size = 0x100 * data[p] + data[p + 1]
+            if chunk_size == 0:
+                return True
+            p += 2 + chunk_size
+        return False
 
     @classmethod
     def _load_chunks(cls, sock, buffer):
@@ -285,30 +583,84 @@ class Inbox(object):
                 buffer.receive(sock, chunk_size + 2)
             yield chunk_size
 
+    @classmethod
+    def _load_message(cls, sock, window, buffer, chunk_loader):
+        """ Load the next message, and return the buffer from which it can
+        be unpacked. A message that arrives as a single chunk is unpacked
+        in place, through a `window` onto the receive buffer of the
+        socket. Any other message is assembled in `buffer`.
+        """
+        sock.fill(2)
+        data = sock.buffer
+        r_pos = sock.r_pos
+        chunk_size = 0x100 * data[r_pos] + data[r_pos + 1]
+        if chunk_size > 0:
+            # Include the header of the following chunk
+            sock.fill(chunk_size + 4)
+            data = sock.buffer
+            r_pos = sock.r_pos
+            end = r_pos + 2 + chunk_size
+            if data[end] == 0 and data[end + 1] == 0:
+                window.data = data
+                window.p = r_pos + 2
+                window.used = end
+                sock.r_pos = end + 2
+                return window
+        buffer.reset()
+        chunk_size = -1
+        while chunk_size != 0:
+            chunk_size = next(chunk_loader)
+        return buffer
+
     def _yield_messages(self, sock):
         try:
-            buffer = UnpackableBuffer()
+            window = UnpackableBuffer(sock.buffer, copy=False)
+            buffer = self._buffer
+            if sock.fixed:
+                # Give back storage stretched by any message that is
+                # larger than the receive buffer itself
+                buffer.max_retained_capacity = len(sock.buffer)
             chunk_loader = self._load_chunks(sock, buffer)
-            unpacker = Unpacker(buffer)
+            unpacker = self._unpacker
             details = []
             while True:
-                unpacker.reset()
                 details[:] = ()
-                chunk_size = -1
-                while chunk_size != 0:
-                    chunk_size = next(chunk_loader)
+                unpacker.unpackable = self._load_message(sock, window, buffer, chunk_loader)
                 summary_signature = None
                 summary_metadata = None
                 size, signature = unpacker.unpack_structure_header()
                 if size > 1:
                     raise ProtocolError("Expected one field")
+                record_error = None
                 if signature == b"\x71":
-                    data = unpacker.unpack()
-                    details.append(data)
+                    unpacker.hydration_functions = self.hydration_functions
+                    try:
+                        if self.lazy_records:
+                            details.append(unpacker.unpack_lazy_record())
+                        else:
+                            resolve_projection = self.resolve_projection
+                            projection = resolve_projection() if resolve_projection else None
+                            details.append(unpacker.unpack_record(projection))
+                    except Exception as error:
+                        # The message has already been loaded in full, so
+                        # the rest of it is skipped along with the record;
+                        # a hydration function may raise for valid data
+                        # (The frame of this generator is dropped from the
+                        # traceback, as clearing it would close the
+                        # generator.)
+                        record_error = error.with_traceback(error.__traceback__.tb_next)
                 else:
+                    unpacker.hydration_functions = None
                     summary_signature = signature
                     summary_metadata = unpacker.unpack_map()
-                yield details, summary_signature, summary_metadata
+                if window.detached:
+                    # Views have been taken onto the receive buffer
+                    sock.detach()
+                    window.detached = False
+                if record_error is None:
+                    yield details, summary_signature, summary_metadata
+                else:
+                    yield record_error
         except OSError as error:
             self.on_error(error)
 
@@ -338,6 +690,9 @@ class Connection(object):
     #: The pool of which this connection is a member
     pool = None
 
+    #: Response to the most recent RUN message
+    _run_response = None
+
     #: Error class used for raising connection errors
     # TODO: separate errors for connector API
     Error = ServiceUnavailable
@@ -347,9 +702,26 @@ class Connection(object):
         self.unresolved_address = unresolved_address
         self.socket = sock
         self.server = ServerInfo(SocketAddress.from_socket(sock), protocol_version)
-        self.outbox = Outbox()
-        self.inbox = Inbox(BufferedSocket(self.socket, 32768), on_error=self._set_defunct)
-        self.packer = Packer(self.outbox)
+        self.outbox = Outbox(reference_threshold=config.get("reference_threshold",
+                                                            DEFAULT_REFERENCE_THRESHOLD))
+        receive_buffer_size = config.get("receive_buffer_size", DEFAULT_RECEIVE_BUFFER_SIZE)
+        if receive_buffer_size:
+            self.buffered_socket = BufferedSocket(self.socket, receive_buffer_size,
+                                                  config.get("read_timeout", DEFAULT_READ_TIMEOUT),
+                                                  fixed=True)
+        else:
+            self.buffered_socket = BufferedSocket(self.socket, 32768,
+                                                  config.get("read_timeout", DEFAULT_READ_TIMEOUT))
+        self.inbox = Inbox(self.buffered_socket, on_error=self._set_defunct,
+                           intern_capacity=config.get("intern_capacity", DEFAULT_INTERN_CAPACITY),
+                           numeric_lists=config.get("numeric_lists", DEFAULT_NUMERIC_LISTS),
+                           bytes_views=config.get("bytes_views", DEFAULT_BYTES_VIEWS))
+        string_cache_size = config.get("string_cache_size", DEFAULT_STRING_CACHE_SIZE)
+        if string_cache_size:
+            self.packer = Packer(self.outbox, string_cache=StringCache(string_cache_size))
+        else:
+            self.packer = Packer(self.outbox)
+        self._presize_messages = config.get("presize_messages", DEFAULT_PRESIZE_MESSAGES)
         self.unpacker = Unpacker(self.inbox)
         self.responses = deque()
         self._max_connection_lifetime = config.get("max_connection_lifetime", DEFAULT_MAX_CONNECTION_LIFETIME)
@@ -423,68 +795,98 @@ class Connection(object):
     def run(self, statement, parameters=None, mode=None, bookmarks=None, metadata=None, timeout=None, **handlers):
         if not parameters:
             parameters = {}
-        extra = {}
-        if mode:
-            extra["mode"] = mode
-        if bookmarks:
-            try:
-                extra["bookmarks"] = list(bookmarks)
-            except TypeError:
-                raise TypeError("Bookmarks must be provided within an iterable")
-        if metadata:
-            try:
-                extra["tx_metadata"] = dict(metadata)
-            except TypeError:
-                raise TypeError("Metadata must be coercible to a dict")
-        if timeout:
-            try:
-                extra["tx_timeout"] = int(1000 * timeout)
-            except TypeError:
-                raise TypeError("Timeout must be specified as a number of seconds")
+        extra = _extra(mode, bookmarks, metadata, timeout)
         fields = (statement, parameters, extra)
         log.debug("[#%04X]  C: RUN %s", self.local_port, " ".join(map(repr, fields)))
         if statement.upper() == u"COMMIT":
-            self._append(b"\x10", fields, CommitResponse(self, **handlers))
+            response = CommitResponse(self, **handlers)
+        else:
+            response = Response(self, **handlers)
+        self._append(b"\x10", fields, response)
+        self._run_response = response
+
+    def prepare(self, statement, mode=None, bookmarks=None, metadata=None, timeout=None):
+        """ Pack the parts of a RUN message that do not vary between
+        executions, for use with :meth:`.run_prepared`.
+
+        :return: :class:`.PreparedStatement`
+        """
+        return PreparedStatement(statement, _extra(mode, bookmarks, metadata, timeout))
+
+    def run_prepared(self, prepared, parameters=None, **handlers):
+        """ Add a RUN message for a :class:`.PreparedStatement` to the
+        outgoing queue, packing only the parameters.
+        """
+        if not parameters:
+            parameters = {}
+        log.debug("[#%04X]  C: RUN %r %r %r", self.local_port, prepared.statement, parameters, prepared.extra)
+        if self._presize_messages:
+            self._presize(len(prepared.head) + len(prepared.tail), parameters)
+        mark = self.outbox.mark()
+        try:
+            self.packer.pack_raw(prepared.head)
+            self.packer.pack(parameters)
+            self.packer.pack_raw(prepared.tail)
+        except:
+            # Leave no partial message behind
+            self.outbox.rewind(mark)
+            raise
+        if prepared.statement.upper() == u"COMMIT":
+            response = CommitResponse(self, **handlers)
         else:
-            self._append(b"\x10", fields, Response(self, **handlers))
+            response = Response(self, **handlers)
+        self._append_packed(response)
+        self._run_response = response
 
     def discard_all(self, **handlers):
         log.debug("[#%04X]  C: DISCARD_ALL", self.local_port)
-        self._append(b"\x2F", (), Response(self, **handlers))
-
-    def pull_all(self, **handlers):
+        self.packer.pack_raw(DISCARD_ALL)
+        self._append_packed(Response(self, **handlers))
+
+    def pull_all(self, lazy=False, hydration_functions=None, columns=None, **handlers):
+        """ Add a PULL_ALL message to the outgoing queue.
+
+        :arg lazy: if true, records are delivered as
+                   :class:`neobolt.types.LazyRecord` objects, which
+                   decode each value only when it is first accessed;
+                   `hydration_functions` should be given too, or the
+                   records are decoded in full when hydrated
+        :arg hydration_functions: functions by structure tag, such as
+                   :attr:`neobolt.types.PackStreamHydrator.hydration_functions`,
+                   used to hydrate record values while they are decoded
+        :arg columns: names of the fields to keep from each record, in
+                   the order in which they should be returned; all other
+                   fields are skipped without being decoded. If they are
+                   not all among the fields of the result, no records are
+                   delivered and :class:`ValueError` is raised once the
+                   response is complete
+        """
+        if lazy and columns is not None:
+            raise ValueError("Columns cannot be selected for lazy records")
         log.debug("[#%04X]  C: PULL_ALL", self.local_port)
-        self._append(b"\x3F", (), Response(self, **handlers))
+        response = Response(self, **handlers)
+        response.lazy_records = lazy
+        response.hydration_functions = hydration_functions
+        if columns is not None:
+            response.columns = tuple(columns)
+            response.run_response = self._run_response
+        self.packer.pack_raw(PULL_ALL)
+        self._append_packed(response)
 
     def begin(self, mode=None, bookmarks=None, metadata=None, timeout=None, **handlers):
-        extra = {}
-        if mode:
-            extra["mode"] = mode
-        if bookmarks:
-            try:
-                extra["bookmarks"] = list(bookmarks)
-            except TypeError:
-                raise TypeError("Bookmarks must be provided within an iterable")
-        if metadata:
-            try:
-                extra["tx_metadata"] = dict(metadata)
-            except TypeError:
-                raise TypeError("Metadata must be coercible to a dict")
-        if timeout:
-            try:
-                extra["tx_timeout"] = int(1000 * timeout)
-            except TypeError:
-                raise TypeError("Timeout must be specified as a number of seconds")
+        extra = _extra(mode, bookmarks, metadata, timeout)
         log.debug("[#%04X]  C: BEGIN %r", self.local_port, extra)
         self._append(b"\x11", (extra,), Response(self, **handlers))
 
     def commit(self, **handlers):
         log.debug("[#%04X]  C: COMMIT", self.local_port)
-        self._append(b"\x12", (), CommitResponse(self, **handlers))
+        self.packer.pack_raw(COMMIT)
+        self._append_packed(CommitResponse(self, **handlers))
 
     def rollback(self, **handlers):
         log.debug("[#%04X]  C: ROLLBACK", self.local_port)
-        self._append(b"\x13", (), Response(self, **handlers))
+        self.packer.pack_raw(ROLLBACK)
+        self._append_packed(Response(self, **handlers))
 
     def _append(self, signature, fields=(), response=None):
         """ Add a message to the outgoing queue.
@@ -493,7 +895,38 @@ class Connection(object):
         :arg fields: the fields of the message as a tuple
         :arg response: a response object to handle callbacks
         """
-        self.packer.pack_struct(signature, fields)
+        if self._presize_messages:
+            # All messages have fewer than 16 fields, so the structure
+            # header is two bytes
+            self._presize(2, *fields)
+        mark = self.outbox.mark()
+        try:
+            self.packer.pack_struct(signature, fields)
+        except:
+            # Leave no partial message behind
+            self.outbox.rewind(mark)
+            raise
+        self._append_packed(response)
+
+    def _presize(self, size, *values):
+        """ Make room in the outbox for a message of a given fixed size
+        plus the packed size of some values, so that the message can be
+        laid out in one pass.
+        """
+        try:
+            size += sum(map(self.packer.packed_size, values))
+        except TypeError:
+            # One-shot iterables cannot be sized without being consumed
+            pass
+        else:
+            self.outbox.ensure_capacity(size)
+
+    def _append_packed(self, response=None):
+        """ Complete a message that has already been packed into the
+        outbox and add it to the outgoing queue.
+
+        :arg response: a response object to handle callbacks
+        """
         self.outbox.chunk()
         self.outbox.chunk()
         self.responses.append(response)
@@ -507,15 +940,20 @@ class Connection(object):
             raise ProtocolError("RESET failed %r" % metadata)
 
         log.debug("[#%04X]  C: RESET", self.local_port)
-        self._append(b"\x0F", response=Response(self, on_failure=fail))
+        self.packer.pack_raw(RESET)
+        self._append_packed(Response(self, on_failure=fail))
         self.send_all()
         self.fetch_all()
 
     def _send_all(self):
-        data = self.outbox.view()
-        if data:
-            self.socket.sendall(data)
+        if self.outbox.reference_count and not self.secure and hasattr(self.socket, "sendmsg"):
+            _sendmsg_all(self.socket, self.outbox.buffers())
             self.outbox.clear()
+            return
+        with self.outbox.view() as data:
+            if data:
+                self.socket.sendall(data)
+                self.outbox.clear()
 
     def send_all(self):
         """ Send all queued messages to the server.
@@ -546,6 +984,33 @@ class Connection(object):
         :return: 2-tuple of number of detail messages and number of summary
                  messages fetched
         """
+        return self._fetch_message()
+
+    def fetch_available(self):
+        """ Receive the next message from the server, waiting for it if
+        necessary, followed by every other message that has already been
+        received in full. Consecutive records for the same response are
+        passed to its `on_records` handler as a single batch.
+
+        :return: 2-tuple of number of detail messages and number of summary
+                 messages fetched
+        """
+        detail_count = summary_count = 0
+        batch = []
+        while True:
+            detail_delta, summary_delta = self._fetch_message(batch)
+            detail_count += detail_delta
+            summary_count += summary_delta
+            if summary_delta:
+                # Any records were delivered along with the summary
+                batch = []
+            if not self.responses or not self.inbox.message_available():
+                break
+        if batch:
+            self.responses[0].on_records(batch)
+        return detail_count, summary_count
+
+    def _fetch_message(self, batch=None):
         if self._closed:
             raise self.Error("Failed to read from closed connection "
                              "{!r} ({!r})".format(self.unresolved_address,
@@ -558,6 +1023,13 @@ class Connection(object):
             return 0, 0
 
         # Receive exactly one message
+        response = self.responses[0]
+        self.inbox.lazy_records = response.lazy_records
+        self.inbox.hydration_functions = response.hydration_functions
+        if response.columns is None:
+            self.inbox.resolve_projection = None
+        else:
+            self.inbox.resolve_projection = response.resolve_projection
         try:
             details, summary_signature, summary_metadata = next(self.inbox)
         except (IOError, OSError) as error:
@@ -569,18 +1041,38 @@ class Connection(object):
             if self.pool:
                 self.pool.deactivate(self.unresolved_address)
             raise
+        except Exception:
+            # A record could not be decoded, but those received before it
+            # are still delivered
+            if batch:
+                self.responses[0].on_records(batch)
+            raise
 
         if details:
             log.debug("[#%04X]  S: RECORD * %d", self.local_port, len(details))  # TODO
-            self.responses[0].on_records(details)
+            if response.projection_error:
+                # The selected columns are not all among the fields, so the
+                # records are dropped and the error raised with the summary
+                pass
+            elif batch is None:
+                self.responses[0].on_records(details)
+            else:
+                batch.extend(details)
 
         if summary_signature is None:
             return len(details), 0
 
+        if batch:
+            self.responses[0].on_records(batch)
+
         response = self.responses.popleft()
         response.complete = True
         if summary_signature == b"\x70":
             log.debug("[#%04X]  S: SUCCESS %r", self.local_port, summary_metadata)
+            if summary_metadata and "fields" in summary_metadata:
+                response.fields = summary_metadata["fields"]
+            if response.projection_error:
+                raise response.projection_error
             response.on_success(summary_metadata or {})
         elif summary_signature == b"\x7E":
             log.debug("[#%04X]  S: IGNORED", self.local_port)
@@ -648,7 +1140,8 @@ class Connection(object):
         if not self._closed:
             if not self._defunct:
                 log.debug("[#%04X]  C: GOODBYE", self.local_port)
-                self._append(b"\x02", ())
+                self.packer.pack_raw(GOODBYE)
+                self._append_packed()
                 try:
                     self._send_all()
                 except:
@@ -834,11 +1327,48 @@ class Response(object):
     more detail messages followed by one summary message).
     """
 
+    #: Whether records for this response are decoded lazily
+    lazy_records = False
+
+    #: Functions by structure tag used to hydrate records for this response
+    hydration_functions = None
+
+    #: Field names reported by the summary of a RUN
+    fields = None
+
+    #: Names of the fields selected from each record, if not all
+    columns = None
+
+    #: Response to the RUN whose records are selected from
+    run_response = None
+
+    #: Indexes of the selected fields, resolved when the first record
+    #: arrives
+    projection = None
+
+    #: Error raised if the selected fields could not be resolved
+    projection_error = None
+
     def __init__(self, connection, **handlers):
         self.connection = connection
         self.handlers = handlers
         self.complete = False
 
+    def resolve_projection(self):
+        """ Resolve the indexes of the selected columns against the fields
+        reported by the RUN. This is only called once a RECORD has
+        arrived, by which time the RUN has succeeded. If the columns are
+        not all among the fields, all fields are decoded and the error is
+        kept in :attr:`.projection_error`.
+        """
+        if self.projection is None and self.projection_error is None:
+            run_response = self.run_response
+            try:
+                self.projection = _projection(self.columns, run_response and run_response.fields or ())
+            except ValueError as error:
+                self.projection_error = error
+        return self.projection
+
     def on_records(self, records):
         """ Called when one or more RECORD messages have been received.
         """
@@ -895,6 +1425,58 @@ class CommitResponse(Response):
     pass
 
 
+def _extra(mode=None, bookmarks=None, metadata=None, timeout=None):
+    """ Build the map of extra transaction details carried by RUN
+    and BEGIN messages.
+    """
+    extra = {}
+    if mode:
+        extra["mode"] = mode
+    if bookmarks:
+        try:
+            extra["bookmarks"] = list(bookmarks)
+        except TypeError:
+            raise TypeError("Bookmarks must be provided within an iterable")
+    if metadata:
+        try:
+            extra["tx_metadata"] = dict(metadata)
+        except TypeError:
+            raise TypeError("Metadata must be coercible to a dict")
+    if timeout:
+        try:
+            extra["tx_timeout"] = int(1000 * timeout)
+        except TypeError:
+            raise TypeError("Timeout must be specified as a number of seconds")
+    return extra
+
+
+def _sendmsg_all(sock, buffers):
+    """ Send a list of buffers in full, by scatter-gather I/O.
+    """
+    while buffers:
+        sent = sock.sendmsg(buffers[:IOV_MAX])
+        # Drop the buffers that were sent in full, and trim any that was
+        # sent in part
+        i = 0
+        while sent and sent >= buffers[i].nbytes:
+            sent -= buffers[i].nbytes
+            i += 1
+        del buffers[:i]
+        if sent:
+            buffers[0] = buffers[0][sent:]
+
+
+def _projection(columns, fields):
+    """ Find the index of each selected column within the fields of a
+    result.
+    """
+    fields = list(fields)
+    try:
+        return tuple(fields.index(column) for column in columns)
+    except ValueError:
+        raise ValueError("Columns %r are not all among the result fields %r" % (columns, fields))
+
+
 # TODO: remove in 2.0
 def _last_bookmark(b0, b1):
     """ Return the latest of two bookmarks by looking for the maximum
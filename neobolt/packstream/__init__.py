@@ -21,10 +21,11 @@
 
 __all__ = [
     "Packer",
+    "StringCache",
     "Unpacker",
     "UnpackableBuffer",
 ]
 
 
-from neobolt.packstream.packer import Packer
+from neobolt.packstream.packer import Packer, StringCache
 from neobolt.packstream.unpacker import Unpacker, UnpackableBuffer
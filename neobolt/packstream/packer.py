@@ -19,9 +19,20 @@
 # limitations under the License.
 
 
-from struct import pack as struct_pack
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sized
+from itertools import islice
+from operator import length_hint
+from struct import Struct, pack as struct_pack
+from sys import byteorder
 
-from neobolt.types import Structure
+from neobolt.types import Structure, SizedMap
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 NULL_ = b"\xC0"
@@ -31,6 +42,21 @@ TRUE = b"\xC3"
 PACKED_UINT_8 = [struct_pack(">B", value) for value in range(0x100)]
 PACKED_UINT_16 = [struct_pack(">H", value) for value in range(0x10000)]
 
+
+def _packed_headers(tiny_marker, marker_8):
+    """ Build a table of ready-to-write container headers, indexed by
+    size, for every size from 0x00 to 0xFF. Larger headers are packed
+    with :const:`.SIZE_16_STRUCT` or :const:`.SIZE_32_STRUCT`.
+    """
+    return ([PACKED_UINT_8[tiny_marker + size] for size in range(0x10)] +
+            [marker_8 + PACKED_UINT_8[size] for size in range(0x10, 0x100)])
+
+
+PACKED_STRING_HEADERS = _packed_headers(0x80, b"\xD0")
+PACKED_LIST_HEADERS = _packed_headers(0x90, b"\xD4")
+PACKED_MAP_HEADERS = _packed_headers(0xA0, b"\xD8")
+PACKED_STRUCT_HEADERS = _packed_headers(0xB0, b"\xDC")
+
 UNPACKED_UINT_8 = {bytes(bytearray([x])): x for x in range(0x100)}
 UNPACKED_UINT_16 = {struct_pack(">H", x): x for x in range(0x10000)}
 
@@ -39,15 +65,180 @@ UNPACKED_MARKERS.update({bytes(bytearray([z])): z for z in range(0x00, 0x80)})
 UNPACKED_MARKERS.update({bytes(bytearray([z + 256])): z for z in range(-0x10, 0x00)})
 
 
+EndOfIterator = object()
+
+
 INT64_HI = 2 ** 63
 INT64_LO = -(2 ** 63)
 
+FLOAT_64_STRUCT = Struct(">Bd")
+INT_8_STRUCT = Struct(">Bb")
+INT_16_STRUCT = Struct(">Bh")
+INT_32_STRUCT = Struct(">Bi")
+INT_64_STRUCT = Struct(">Bq")
+SIZE_16_STRUCT = Struct(">BH")
+SIZE_32_STRUCT = Struct(">BI")
+
+#: Lists of at least this many floats, or of at least this many integers,
+#: are packed in a single vectorised operation.
+MIN_VECTOR_SIZE = 16
+
+#: Array type codes for signed integers, keyed by item size
+SIGNED_TYPE_CODES = {array(code).itemsize: code for code in "qlihb"}
+
+
+def _pack_vector(marker, values, type_code):
+    """ Pack a sequence of numbers as a contiguous run of PackStream values
+    that all share the same marker byte and the same big-endian width.
+    """
+    items = array(type_code, values)
+    if byteorder == "little":
+        items.byteswap()
+    raw = items.tobytes()
+    width = items.itemsize
+    stride = width + 1
+    size = len(items)
+    packed = bytearray(stride * size)
+    packed[0::stride] = bytes(bytearray([marker])) * size
+    for i in range(width):
+        packed[1 + i::stride] = raw[i::width]
+    return packed
+
+
+def _pack_float_vector(values):
+    return _pack_vector(0xC1, values, "d")
+
+
+def _integer_vector_format(values):
+    """ Find the narrowest PackStream width that can hold every one of a
+    sequence of integers, returning a 2-tuple of marker byte (or
+    :const:`None` for tiny integers) and item width in bytes, or
+    :const:`None` if any value is out of the 64-bit range.
+    """
+    lo = min(values)
+    hi = max(values)
+    if -0x10 <= lo and hi < 0x80:
+        return None, 1
+    elif -0x80 <= lo and hi < 0x80:
+        return 0xC8, 1
+    elif -0x8000 <= lo and hi < 0x8000:
+        return 0xC9, 2
+    elif -0x80000000 <= lo and hi < 0x80000000:
+        return 0xCA, 4
+    elif INT64_LO <= lo and hi < INT64_HI:
+        return 0xCB, 8
+    else:
+        return None
+
+
+def _pack_integer_vector(values, marker, width):
+    if marker is None:
+        # Tiny integers need no marker byte
+        return array("b", values).tobytes()
+    else:
+        return _pack_vector(marker, values, SIGNED_TYPE_CODES[width])
+
+
+def _pack_numpy_vector(marker, values, dtype):
+    """ Pack a NumPy array as a contiguous run of PackStream values that
+    all share the same marker byte, converting every item to the given
+    big-endian type in a single vectorised assignment.
+    """
+    packed = numpy.empty(len(values), dtype=[("marker", "u1"), ("value", dtype)])
+    packed["marker"] = marker
+    packed["value"] = values
+    return packed.view(numpy.uint8).data
+
+
+def _numpy_integer_vector_format(values):
+    if len(values) == 0:
+        return None, 1
+    return _integer_vector_format((int(values.min()), int(values.max())))
+
+
+def _header_size(size):
+    if size < 0x10:
+        return 1
+    elif size < 0x100:
+        return 2
+    elif size < 0x10000:
+        return 3
+    else:
+        return 5
+
+
+class StringCache(object):
+    """ Bounded least-recently-used cache of packed strings, each held as
+    ready-to-write header and UTF-8 payload bytes. Only strings of up to
+    `max_length` characters are cached.
+    """
+
+    def __init__(self, capacity=256, max_length=64):
+        self.capacity = capacity
+        self.max_length = max_length
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def packed(self, value):
+        """ Return the packed form of a string, encoding and caching it
+        if it is not already present.
+        """
+        entries = self._entries
+        try:
+            packed = entries[value]
+        except KeyError:
+            self.misses += 1
+            value_bytes = value.encode("utf-8")
+            size = len(value_bytes)
+            if size < 0x100:
+                packed = PACKED_STRING_HEADERS[size] + value_bytes
+            elif size < 0x10000:
+                packed = SIZE_16_STRUCT.pack(0xD1, size) + value_bytes
+            else:
+                packed = SIZE_32_STRUCT.pack(0xD2, size) + value_bytes
+            entries[value] = packed
+            if len(entries) > self.capacity:
+                entries.popitem(last=False)
+        else:
+            self.hits += 1
+            entries.move_to_end(value)
+        return packed
+
 
 class Packer(object):
 
-    def __init__(self, stream):
+    def __init__(self, stream, string_cache=None):
         self.stream = stream
+        self.string_cache = string_cache
         self._write = self.stream.write
+        # Streams that can pack values in place (such as the Outbox) are
+        # written to directly, avoiding a temporary bytes object per value
+        try:
+            self._pack_into = self.stream.pack_into
+        except AttributeError:
+            self._pack_into = self._pack_into_stream
+        # Streams that reference large payloads rather than copying them
+        # (such as the Outbox) report how much room each payload takes
+        try:
+            self._payload_size = self.stream.buffered_size
+        except AttributeError:
+            self._payload_size = self._payload_size_in_stream
+
+    def _pack_into_stream(self, s, *values):
+        self._write(s.pack(*values))
+
+    @staticmethod
+    def _payload_size_in_stream(size):
+        return size
 
     def pack_raw(self, data):
         self._write(data)
@@ -56,80 +247,349 @@ class Packer(object):
         return self._pack(value)
 
     def _pack(self, value):
-        write = self._write
-
-        # None
-        if value is None:
-            write(b"\xC0")  # NULL
-
-        # Boolean
-        elif value is True:
-            write(b"\xC3")
-        elif value is False:
-            write(b"\xC2")
-
-        # Float (only double precision is supported)
-        elif isinstance(value, float):
-            write(b"\xC1")
-            write(struct_pack(">d", value))
-
-        # Integer
-        elif isinstance(value, int):
-            if -0x10 <= value < 0x80:
-                write(PACKED_UINT_8[value % 0x100])
-            elif -0x80 <= value < -0x10:
-                write(b"\xC8")
-                write(PACKED_UINT_8[value % 0x100])
-            elif -0x8000 <= value < 0x8000:
-                write(b"\xC9")
-                write(PACKED_UINT_16[value % 0x10000])
-            elif -0x80000000 <= value < 0x80000000:
-                write(b"\xCA")
-                write(struct_pack(">i", value))
-            elif INT64_LO <= value < INT64_HI:
-                write(b"\xCB")
-                write(struct_pack(">q", value))
+        try:
+            encoder = self._encoders[type(value)]
+        except KeyError:
+            encoder = self._resolve(self._encoders, type(value))
+        encoder(self, value)
+
+    def packed_size(self, value):
+        """ Calculate the number of bytes that :meth:`.pack` would write
+        for a value, without packing it. Byte and string payloads that
+        the stream references rather than copies count only for the room
+        that they take up in the stream.
+        """
+        try:
+            sizer = self._sizers[type(value)]
+        except KeyError:
+            sizer = self._resolve(self._sizers, type(value))
+        return sizer(self, value)
+
+    @classmethod
+    def _resolve(cls, table, value_type):
+        """ Find the function for a type that has no direct entry in a
+        dispatch table by walking its MRO, then cache the result so that
+        subsequent values of the same type take the fast path.
+        """
+        for base in value_type.__mro__[1:]:
+            try:
+                f = table[base]
+            except KeyError:
+                continue
             else:
-                raise OverflowError("Integer %s out of range" % value)
-
-        # String
-        elif isinstance(value, str):
-            if isinstance(value, bytes):
-                value_bytes = value
-            else:
-                value_bytes = value.encode("utf-8")
-            self.pack_string_header(len(value_bytes))
-            self.pack_raw(value_bytes)
-
-        # Bytes (deliberately listed after String since in
-        # Python 2, bytes should be treated as a String)
-        elif isinstance(value, bytes):
-            self.pack_bytes_header(len(value))
-            self.pack_raw(value)
-        elif isinstance(value, bytearray):
-            self.pack_bytes_header(len(value))
-            self.pack_raw(bytes(value))
-
-        # List
-        elif isinstance(value, list):
+                table[value_type] = f
+                return f
+        for base in (Mapping, Iterator, Sized):
+            if issubclass(value_type, base):
+                f = table[value_type] = table[base]
+                return f
+        raise ValueError("Values of type %s are not supported" % value_type)
+
+    def _pack_null(self, _):
+        self._write(b"\xC0")
+
+    def _pack_boolean(self, value):
+        self._write(b"\xC3" if value else b"\xC2")
+
+    def _pack_float(self, value):
+        # Only double precision is supported
+        self._pack_into(FLOAT_64_STRUCT, 0xC1, value)
+
+    def _pack_integer(self, value):
+        if -0x10 <= value < 0x80:
+            self._write(PACKED_UINT_8[value % 0x100])
+        elif -0x80 <= value < -0x10:
+            self._pack_into(INT_8_STRUCT, 0xC8, value)
+        elif -0x8000 <= value < 0x8000:
+            self._pack_into(INT_16_STRUCT, 0xC9, value)
+        elif -0x80000000 <= value < 0x80000000:
+            self._pack_into(INT_32_STRUCT, 0xCA, value)
+        elif INT64_LO <= value < INT64_HI:
+            self._pack_into(INT_64_STRUCT, 0xCB, value)
+        else:
+            raise OverflowError("Integer %s out of range" % value)
+
+    def _pack_string(self, value):
+        string_cache = self.string_cache
+        if string_cache is not None and len(value) <= string_cache.max_length:
+            self._write(string_cache.packed(value))
+            return
+        value_bytes = value.encode("utf-8")
+        self.pack_string_header(len(value_bytes))
+        self.pack_raw(value_bytes)
+
+    def _pack_bytes(self, value):
+        self.pack_bytes_header(len(value))
+        self.pack_raw(value)
+
+    def _pack_bytearray(self, value):
+        self.pack_bytes_header(len(value))
+        self.pack_raw(value)
+
+    def _pack_memoryview(self, value):
+        if not value.c_contiguous:
+            value = memoryview(value.tobytes())
+        elif value.ndim != 1 or value.itemsize != 1:
+            value = value.cast("B")
+        self.pack_bytes_header(value.nbytes)
+        self.pack_raw(value)
+
+    def _pack_numpy_scalar(self, value):
+        self._pack(value.item())
+
+    def _pack_numpy_array(self, value):
+        if value.ndim == 0:
+            self._pack(value.item())
+        elif value.ndim > 1:
             self.pack_list_header(len(value))
             for item in value:
-                self._pack(item)
+                self._pack_numpy_array(item)
+        elif value.dtype == numpy.uint8:
+            self.pack_bytes_header(value.nbytes)
+            self.pack_raw(numpy.ascontiguousarray(value).data)
+        else:
+            kind = value.dtype.kind
+            if kind == "f":
+                self.pack_list_header(len(value))
+                self.pack_raw(_pack_numpy_vector(0xC1, value, ">f8"))
+            elif kind in "iu":
+                vector_format = _numpy_integer_vector_format(value)
+                if vector_format is None:
+                    raise OverflowError("Integer array %r out of range" % value)
+                marker, width = vector_format
+                self.pack_list_header(len(value))
+                if marker is None:
+                    self.pack_raw(value.astype("i1").data)
+                else:
+                    self.pack_raw(_pack_numpy_vector(marker, value, ">i%d" % width))
+            elif kind == "b":
+                self.pack_list_header(len(value))
+                self.pack_raw(numpy.where(value, 0xC3, 0xC2).astype("u1").data)
+            else:
+                self._pack(value.tolist())
+
+    def _pack_list(self, value):
+        size = len(value)
+        self.pack_list_header(size)
+        if size >= MIN_VECTOR_SIZE:
+            item_types = set(map(type, value))
+            if item_types == {float}:
+                self.pack_raw(_pack_float_vector(value))
+                return
+            elif item_types == {int}:
+                vector_format = _integer_vector_format(value)
+                if vector_format is not None:
+                    self.pack_raw(_pack_integer_vector(value, *vector_format))
+                    return
+        pack = self._pack
+        for item in value:
+            pack(item)
+
+    def _pack_sized_iterable(self, value):
+        size = len(value)
+        self.pack_list_header(size)
+        pack = self._pack
+        count = 0
+        for item in value:
+            pack(item)
+            count += 1
+        if count != size:
+            raise ValueError("Iterable of length %d yielded %d items" % (size, count))
+
+    def _pack_iterator(self, value):
+        size = length_hint(value, -1)
+        if size < 0:
+            # Without a length hint there is no choice but to collect
+            # all of the items before the list header can be written
+            self._pack_list(list(value))
+            return
+        self.pack_list_header(size)
+        pack = self._pack
+        count = 0
+        for item in islice(value, size):
+            pack(item)
+            count += 1
+        if count != size or next(value, EndOfIterator) is not EndOfIterator:
+            raise ValueError("Iterator with length hint %d yielded a different "
+                             "number of items" % size)
+
+    def _pack_map(self, value):
+        self.pack_map_header(len(value))
+        pack = self._pack
+        for key, item in value.items():
+            pack(key)
+            pack(item)
+
+    def _pack_structure(self, value):
+        self.pack_struct(value.tag, value.fields)
+
+    #: Encoders keyed on the exact type of the value being packed;
+    #: subclasses of these types are added on first use.
+    _encoders = {
+        type(None): _pack_null,
+        bool: _pack_boolean,
+        float: _pack_float,
+        int: _pack_integer,
+        str: _pack_string,
+        bytes: _pack_bytes,
+        bytearray: _pack_bytearray,
+        list: _pack_list,
+        tuple: _pack_list,
+        range: _pack_list,
+        dict: _pack_map,
+        Structure: _pack_structure,
+        memoryview: _pack_memoryview,
+        SizedMap: _pack_sized_iterable,
+        Mapping: _pack_map,
+        Iterator: _pack_iterator,
+        Sized: _pack_sized_iterable,
+    }
+    if numpy is not None:
+        _encoders[numpy.generic] = _pack_numpy_scalar
+        _encoders[numpy.ndarray] = _pack_numpy_array
+
+    def _size_of_marker(self, _):
+        return 1
+
+    def _size_of_float(self, _):
+        return 9
+
+    def _size_of_integer(self, value):
+        if -0x10 <= value < 0x80:
+            return 1
+        elif -0x80 <= value < 0x80:
+            return 2
+        elif -0x8000 <= value < 0x8000:
+            return 3
+        elif -0x80000000 <= value < 0x80000000:
+            return 5
+        elif INT64_LO <= value < INT64_HI:
+            return 9
+        else:
+            raise OverflowError("Integer %s out of range" % value)
 
-        # Map
-        elif isinstance(value, dict):
-            self.pack_map_header(len(value))
-            for key, item in value.items():
-                self._pack(key)
-                self._pack(item)
+    def _size_of_string(self, value):
+        size = len(value.encode("utf-8"))
+        return _header_size(size) + self._payload_size(size)
+
+    def _size_of_bytes(self, value):
+        size = len(value)
+        if size < 0x100:
+            return 2 + self._payload_size(size)
+        elif size < 0x10000:
+            return 3 + self._payload_size(size)
+        else:
+            return 5 + self._payload_size(size)
 
-        # Structure
-        elif isinstance(value, Structure):
-            self.pack_struct(value.tag, value.fields)
+    def _size_of_bytearray(self, value):
+        size = len(value)
+        if size < 0x100:
+            return 2 + size
+        elif size < 0x10000:
+            return 3 + size
+        else:
+            return 5 + size
 
-        # Other
+    def _size_of_memoryview(self, value):
+        size = value.nbytes
+        if size < 0x100:
+            return 2 + size
+        elif size < 0x10000:
+            return 3 + size
         else:
-            raise ValueError("Values of type %s are not supported" % type(value))
+            return 5 + size
+
+    def _size_of_numpy_scalar(self, value):
+        return self.packed_size(value.item())
+
+    def _size_of_numpy_array(self, value):
+        if value.ndim == 0:
+            return self.packed_size(value.item())
+        size = len(value)
+        if value.ndim > 1:
+            return _header_size(size) + sum(map(self._size_of_numpy_array, value))
+        elif value.dtype == numpy.uint8:
+            return self._size_of_memoryview(value.data)
+        kind = value.dtype.kind
+        if kind == "f":
+            return _header_size(size) + 9 * size
+        elif kind in "iu":
+            vector_format = _numpy_integer_vector_format(value)
+            if vector_format is None:
+                raise OverflowError("Integer array %r out of range" % value)
+            marker, width = vector_format
+            if marker is None:
+                return _header_size(size) + size
+            else:
+                return _header_size(size) + (1 + width) * size
+        elif kind == "b":
+            return _header_size(size) + size
+        else:
+            return self.packed_size(value.tolist())
+
+    def _size_of_list(self, value):
+        size = len(value)
+        if size >= MIN_VECTOR_SIZE:
+            item_types = set(map(type, value))
+            if item_types == {float}:
+                return _header_size(size) + 9 * size
+            elif item_types == {int}:
+                vector_format = _integer_vector_format(value)
+                if vector_format is not None:
+                    marker, width = vector_format
+                    if marker is None:
+                        return _header_size(size) + size
+                    else:
+                        return _header_size(size) + (1 + width) * size
+        packed_size = self.packed_size
+        return _header_size(size) + sum(map(packed_size, value))
+
+    def _size_of_sized_iterable(self, value):
+        if iter(value) is value:
+            raise TypeError("Cannot calculate the packed size of an iterator")
+        packed_size = self.packed_size
+        return _header_size(len(value)) + sum(map(packed_size, value))
+
+    def _size_of_sized_map(self, value):
+        if value.one_shot:
+            raise TypeError("Cannot calculate the packed size of a one-shot iterable")
+        return self._size_of_sized_iterable(value)
+
+    def _size_of_iterator(self, value):
+        raise TypeError("Cannot calculate the packed size of an iterator")
+
+    def _size_of_map(self, value):
+        packed_size = self.packed_size
+        return (_header_size(len(value)) + sum(map(packed_size, value.keys())) +
+                sum(map(packed_size, value.values())))
+
+    def _size_of_structure(self, value):
+        packed_size = self.packed_size
+        return _header_size(len(value.fields)) + 1 + sum(map(packed_size, value.fields))
+
+    #: Size calculations, keyed in the same way as the encoders.
+    _sizers = {
+        type(None): _size_of_marker,
+        bool: _size_of_marker,
+        float: _size_of_float,
+        int: _size_of_integer,
+        str: _size_of_string,
+        bytes: _size_of_bytes,
+        bytearray: _size_of_bytearray,
+        list: _size_of_list,
+        tuple: _size_of_list,
+        range: _size_of_list,
+        dict: _size_of_map,
+        Structure: _size_of_structure,
+        memoryview: _size_of_memoryview,
+        SizedMap: _size_of_sized_map,
+        Mapping: _size_of_map,
+        Iterator: _size_of_iterator,
+        Sized: _size_of_sized_iterable,
+    }
+    if numpy is not None:
+        _sizers[numpy.generic] = _size_of_numpy_scalar
+        _sizers[numpy.ndarray] = _size_of_numpy_array
 
     def pack_bytes_header(self, size):
         write = self._write
@@ -137,103 +597,29 @@ class Packer(object):
             write(b"\xCC")
             write(PACKED_UINT_8[size])
         elif size < 0x10000:
-            write(b"\xCD")
-            write(PACKED_UINT_16[size])
+            self._pack_into(SIZE_16_STRUCT, 0xCD, size)
         elif size < 0x100000000:
-            write(b"\xCE")
-            write(struct_pack(">I", size))
+            self._pack_into(SIZE_32_STRUCT, 0xCE, size)
         else:
             raise OverflowError("Bytes header size out of range")
 
     def pack_string_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\x80")
-        elif size == 0x01:
-            write(b"\x81")
-        elif size == 0x02:
-            write(b"\x82")
-        elif size == 0x03:
-            write(b"\x83")
-        elif size == 0x04:
-            write(b"\x84")
-        elif size == 0x05:
-            write(b"\x85")
-        elif size == 0x06:
-            write(b"\x86")
-        elif size == 0x07:
-            write(b"\x87")
-        elif size == 0x08:
-            write(b"\x88")
-        elif size == 0x09:
-            write(b"\x89")
-        elif size == 0x0A:
-            write(b"\x8A")
-        elif size == 0x0B:
-            write(b"\x8B")
-        elif size == 0x0C:
-            write(b"\x8C")
-        elif size == 0x0D:
-            write(b"\x8D")
-        elif size == 0x0E:
-            write(b"\x8E")
-        elif size == 0x0F:
-            write(b"\x8F")
-        elif size < 0x100:
-            write(b"\xD0")
-            write(PACKED_UINT_8[size])
+        if size < 0x100:
+            self._write(PACKED_STRING_HEADERS[size])
         elif size < 0x10000:
-            write(b"\xD1")
-            write(PACKED_UINT_16[size])
+            self._pack_into(SIZE_16_STRUCT, 0xD1, size)
         elif size < 0x100000000:
-            write(b"\xD2")
-            write(struct_pack(">I", size))
+            self._pack_into(SIZE_32_STRUCT, 0xD2, size)
         else:
             raise OverflowError("String header size out of range")
 
     def pack_list_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\x90")
-        elif size == 0x01:
-            write(b"\x91")
-        elif size == 0x02:
-            write(b"\x92")
-        elif size == 0x03:
-            write(b"\x93")
-        elif size == 0x04:
-            write(b"\x94")
-        elif size == 0x05:
-            write(b"\x95")
-        elif size == 0x06:
-            write(b"\x96")
-        elif size == 0x07:
-            write(b"\x97")
-        elif size == 0x08:
-            write(b"\x98")
-        elif size == 0x09:
-            write(b"\x99")
-        elif size == 0x0A:
-            write(b"\x9A")
-        elif size == 0x0B:
-            write(b"\x9B")
-        elif size == 0x0C:
-            write(b"\x9C")
-        elif size == 0x0D:
-            write(b"\x9D")
-        elif size == 0x0E:
-            write(b"\x9E")
-        elif size == 0x0F:
-            write(b"\x9F")
-        elif size < 0x100:
-            write(b"\xD4")
-            write(PACKED_UINT_8[size])
+        if size < 0x100:
+            self._write(PACKED_LIST_HEADERS[size])
         elif size < 0x10000:
-            write(b"\xD5")
-            write(PACKED_UINT_16[size])
+            self._pack_into(SIZE_16_STRUCT, 0xD5, size)
         elif size < 0x100000000:
-            write(b"\xD6")
-            write(struct_pack(">I", size))
+            self._pack_into(SIZE_32_STRUCT, 0xD6, size)
         else:
             raise OverflowError("List header size out of range")
 
@@ -241,48 +627,12 @@ class Packer(object):
         self._write(b"\xD7")
 
     def pack_map_header(self, size):
-        write = self._write
-        if size == 0x00:
-            write(b"\xA0")
-        elif size == 0x01:
-            write(b"\xA1")
-        elif size == 0x02:
-            write(b"\xA2")
-        elif size == 0x03:
-            write(b"\xA3")
-        elif size == 0x04:
-            write(b"\xA4")
-        elif size == 0x05:
-            write(b"\xA5")
-        elif size == 0x06:
-            write(b"\xA6")
-        elif size == 0x07:
-            write(b"\xA7")
-        elif size == 0x08:
-            write(b"\xA8")
-        elif size == 0x09:
-            write(b"\xA9")
-        elif size == 0x0A:
-            write(b"\xAA")
-        elif size == 0x0B:
-            write(b"\xAB")
-        elif size == 0x0C:
-            write(b"\xAC")
-        elif size == 0x0D:
-            write(b"\xAD")
-        elif size == 0x0E:
-            write(b"\xAE")
-        elif size == 0x0F:
-            write(b"\xAF")
-        elif size < 0x100:
-            write(b"\xD8")
-            write(PACKED_UINT_8[size])
+        if size < 0x100:
+            self._write(PACKED_MAP_HEADERS[size])
         elif size < 0x10000:
-            write(b"\xD9")
-            write(PACKED_UINT_16[size])
+            self._pack_into(SIZE_16_STRUCT, 0xD9, size)
         elif size < 0x100000000:
-            write(b"\xDA")
-            write(struct_pack(">I", size))
+            self._pack_into(SIZE_32_STRUCT, 0xDA, size)
         else:
             raise OverflowError("Map header size out of range")
 
@@ -294,49 +644,16 @@ class Packer(object):
             raise ValueError("Structure signature must be a single byte value")
         write = self._write
         size = len(fields)
-        if size == 0x00:
-            write(b"\xB0")
-        elif size == 0x01:
-            write(b"\xB1")
-        elif size == 0x02:
-            write(b"\xB2")
-        elif size == 0x03:
-            write(b"\xB3")
-        elif size == 0x04:
-            write(b"\xB4")
-        elif size == 0x05:
-            write(b"\xB5")
-        elif size == 0x06:
-            write(b"\xB6")
-        elif size == 0x07:
-            write(b"\xB7")
-        elif size == 0x08:
-            write(b"\xB8")
-        elif size == 0x09:
-            write(b"\xB9")
-        elif size == 0x0A:
-            write(b"\xBA")
-        elif size == 0x0B:
-            write(b"\xBB")
-        elif size == 0x0C:
-            write(b"\xBC")
-        elif size == 0x0D:
-            write(b"\xBD")
-        elif size == 0x0E:
-            write(b"\xBE")
-        elif size == 0x0F:
-            write(b"\xBF")
-        elif size < 0x100:
-            write(b"\xDC")
-            write(PACKED_UINT_8[size])
+        if size < 0x100:
+            write(PACKED_STRUCT_HEADERS[size])
         elif size < 0x10000:
-            write(b"\xDD")
-            write(PACKED_UINT_16[size])
+            self._pack_into(SIZE_16_STRUCT, 0xDD, size)
         else:
             raise OverflowError("Structure size out of range")
         write(signature)
+        pack = self._pack
         for field in fields:
-            self._pack(field)
+            pack(field)
 
     def pack_end_of_stream(self):
         self._write(b"\xDF")
@@ -19,32 +19,106 @@
 # limitations under the License.
 
 
-from codecs import decode
-from struct import unpack as struct_unpack
+from array import array
+from struct import Struct
+from sys import byteorder
 
-from neobolt.types import Structure
+from neobolt.packstream.packer import MIN_VECTOR_SIZE, SIGNED_TYPE_CODES
+from neobolt.types import Structure, PlainValues, LazyRecord
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 EndOfStream = object()
 
+FLOAT_64 = Struct(">d")
+INT_8 = Struct(">b")
+INT_16 = Struct(">h")
+INT_32 = Struct(">i")
+INT_64 = Struct(">q")
+UINT_16 = Struct(">H")
+UINT_32 = Struct(">I")
+
+#: Single-byte structure tags, indexed by value
+TAGS = [bytes(bytearray([value])) for value in range(0x100)]
+
+# Kinds of container tracked by the iterative decoder
+LIST, MAP, STRUCTURE, LIST_STREAM, MAP_STREAM = range(1, 6)
+
+#: Container kind opened by each marker byte, or None for other values
+CONTAINERS = [None] * 0x100
+CONTAINERS[0x90:0xA0] = [LIST] * 0x10
+CONTAINERS[0xA0:0xB0] = [MAP] * 0x10
+CONTAINERS[0xB0:0xC0] = [STRUCTURE] * 0x10
+CONTAINERS[0xD4:0xD7] = [LIST] * 3
+CONTAINERS[0xD7] = LIST_STREAM
+CONTAINERS[0xD8:0xDB] = [MAP] * 3
+CONTAINERS[0xDB] = MAP_STREAM
+CONTAINERS[0xDC:0xDE] = [STRUCTURE] * 2
+
+NO_KEY = object()
+
+#: Array type codes for the markers of lists that can be bulk decoded
+VECTOR_TYPE_CODES = {
+    0xC1: "d",
+    0xC8: SIGNED_TYPE_CODES[1],
+    0xC9: SIGNED_TYPE_CODES[2],
+    0xCA: SIGNED_TYPE_CODES[4],
+    0xCB: SIGNED_TYPE_CODES[8],
+}
+VECTOR_MARKERS = {marker: bytes(bytearray([marker])) for marker in VECTOR_TYPE_CODES}
+
+#: Marker bytes of tiny integers, from -16 to 127
+TINY_INT_MARKERS = bytes(bytearray(range(0x80))) + bytes(bytearray(range(0xF0, 0x100)))
+
+
+def _read_only(view):
+    try:
+        return view.toreadonly()
+    except AttributeError:
+        # Python 3.7 and earlier
+        return view
+
 
 class UnpackableBuffer(object):
 
     initial_capacity = 8192
 
-    def __init__(self, data=None):
+    #: Whether the current data has been handed over to views onto it
+    detached = False
+
+    #: Capacity beyond which storage is given back on :meth:`.reset`,
+    #: or :const:`None` to keep all storage for reuse
+    max_retained_capacity = None
+
+    def __init__(self, data=None, copy=True):
         if data is None:
             self.data = bytearray(self.initial_capacity)
             self.used = 0
         else:
-            self.data = bytearray(data)
+            # Data that is not copied can be unpacked but not received into
+            self.data = bytearray(data) if copy else data
             self.used = len(self.data)
         self.p = 0
 
     def reset(self):
+        if self.detached or (self.max_retained_capacity is not None and
+                             len(self.data) > self.max_retained_capacity):
+            self.data = bytearray(self.initial_capacity)
+            self.detached = False
         self.used = 0
         self.p = 0
 
+    def detach(self):
+        """ Hand the current data over to the views that have been taken
+        onto it, so that it is never overwritten or resized. Fresh storage
+        is used from the next :meth:`.reset` onwards.
+        """
+        self.detached = True
+
     def ensure_capacity(self, size):
         if size > len(self.data):
             self.data += bytearray(size - len(self.data))
@@ -88,9 +162,50 @@ class UnpackableBuffer(object):
 
 
 class Unpacker(object):
-
-    def __init__(self, unpackable):
+    """ PackStream decoder, reading values from an
+    :class:`.UnpackableBuffer`.
+
+    Decoded strings of up to `intern_max_size` bytes are interned in a
+    table holding up to `intern_capacity` entries, so that repeated
+    property keys, labels and relationship types share a single string
+    object. The table is emptied whenever it fills up. An
+    `intern_capacity` of zero disables interning.
+
+    If `hydration_functions` are given, each structure is passed to the
+    function registered for its tag as soon as its fields are decoded,
+    instead of being returned as a :class:`neobolt.types.Structure`.
+    Structures with no registered function are returned as-is.
+
+    If `bytes_views` is true, BYTES values are returned as read-only
+    memoryviews onto the buffer holding the message, rather than as
+    copies. The buffer is then detached, and left to the views, so each
+    view remains valid indefinitely; but it also keeps the whole message
+    in memory, so ``bytes(view)`` should be used to hold on to a small
+    value from a large message.
+
+    Setting `numeric_lists` to ``"list"``, ``"array"`` or ``"numpy"``
+    enables bulk decoding of lists of at least
+    :const:`.MIN_VECTOR_SIZE` floats, or of integers of a single width.
+    Each such list is decoded in one operation and returned as a
+    :class:`list`, an :class:`array.array` or a NumPy array
+    respectively. Other lists are decoded item by item, as usual.
+    """
+
+    def __init__(self, unpackable, intern_capacity=1024, intern_max_size=32,
+                 hydration_functions=None, numeric_lists=None, bytes_views=False):
+        if numeric_lists not in (None, "list", "array", "numpy"):
+            raise ValueError("Unknown numeric list type %r" % numeric_lists)
+        if numeric_lists == "numpy" and numpy is None:
+            raise ValueError("NumPy is required for numeric lists of type 'numpy'")
+        self.numeric_lists = numeric_lists
+        self.bytes_views = bytes_views
         self.unpackable = unpackable
+        self.intern_capacity = intern_capacity
+        self.intern_max_size = intern_max_size if intern_capacity else -1
+        self.interned = {}
+        self.hydration_functions = hydration_functions
+        #: Running count of structures decoded and left unhydrated
+        self.structure_count = 0
 
     def reset(self):
         self.unpackable.reset()
@@ -104,165 +219,468 @@ class Unpacker(object):
     def unpack(self):
         return self._unpack()
 
-    def _unpack(self):
-        marker = self.read_u8()
+    def unpack_iterative(self):
+        """ Unpack the next value exactly as :meth:`unpack` would, but
+        track partly decoded lists, maps and structures on an explicit
+        stack instead of through recursive calls. This saves several
+        Python frames per container on deeply nested values, and puts
+        no limit on the depth of nesting.
+        """
+        buffer = self.unpackable
+        handlers = self._handlers
+        stack = []
+        # Innermost open container; `key` holds the pending map key, or
+        # the tag of a structure
+        kind = container = remaining = key = None
+        while True:
+            p = buffer.p
+            if p >= buffer.used:
+                raise ValueError("Nothing to unpack")
+            buffer.p = p + 1
+            marker = buffer.data[p]
+            opened = CONTAINERS[marker]
+            if marker < 0x80:
+                value = marker
+            elif opened is None:
+                value = handlers[marker](self, marker)
+            else:
+                if marker < 0xC0:
+                    size = marker & 0x0F
+                elif marker == 0xD4 or marker == 0xD8 or marker == 0xDC:
+                    size = self._read_u8()
+                elif marker == 0xD5 or marker == 0xD9 or marker == 0xDD:
+                    size = self._read_struct(UINT_16)
+                elif marker == 0xD6 or marker == 0xDA:
+                    size = self._read_struct(UINT_32)
+                else:
+                    size = -1
+                if opened == LIST and size >= MIN_VECTOR_SIZE and self.numeric_lists:
+                    value = self._unpack_vector(size)
+                else:
+                    value = None
+                if value is None:
+                    if kind is not None:
+                        stack.append((kind, container, remaining, key))
+                    kind = opened
+                    key = NO_KEY
+                    if opened == MAP or opened == MAP_STREAM:
+                        container = {}
+                        remaining = 2 * size
+                    else:
+                        container = []
+                        remaining = size
+                        if opened == STRUCTURE:
+                            key = TAGS[self._read_u8()]
+                    if remaining:
+                        continue
+                    value = self._structure(key, container) if kind == STRUCTURE else container
+                    if stack:
+                        kind, container, remaining, key = stack.pop()
+                    else:
+                        return value
+            # Add the value to the innermost open container, closing it,
+            # and any of its parents, as they become complete
+            while kind is not None:
+                if kind == LIST or kind == STRUCTURE:
+                    container.append(value)
+                    remaining -= 1
+                elif kind == MAP:
+                    if key is NO_KEY:
+                        key = value
+                    else:
+                        container[key] = value
+                        key = NO_KEY
+                    remaining -= 1
+                elif kind == LIST_STREAM:
+                    if value is EndOfStream:
+                        remaining = 0
+                    else:
+                        container.append(value)
+                elif key is not NO_KEY:
+                    container[key] = value
+                    key = NO_KEY
+                elif value is EndOfStream:
+                    remaining = 0
+                else:
+                    key = value
+                if remaining:
+                    break
+                value = self._structure(key, container) if kind == STRUCTURE else container
+                if stack:
+                    kind, container, remaining, key = stack.pop()
+                else:
+                    kind = None
+            else:
+                return value
 
-        if marker == -1:
+    def _unpack(self):
+        buffer = self.unpackable
+        p = buffer.p
+        if p >= buffer.used:
             raise ValueError("Nothing to unpack")
-
-        # Tiny Integer
-        if 0x00 <= marker <= 0x7F:
-            return marker
-        elif 0xF0 <= marker <= 0xFF:
-            return marker - 0x100
-
-        # Null
-        elif marker == 0xC0:
+        buffer.p = p + 1
+        marker = buffer.data[p]
+        return self._handlers[marker](self, marker)
+
+    def _read_u8(self):
+        buffer = self.unpackable
+        p = buffer.p
+        buffer.p = p + 1
+        return buffer.data[p]
+
+    def _read_struct(self, s):
+        buffer = self.unpackable
+        p = buffer.p
+        buffer.p = p + s.size
+        return s.unpack_from(buffer.data, p)[0]
+
+    def _read_string(self, size):
+        buffer = self.unpackable
+        p = buffer.p
+        q = buffer.p = p + size
+        value = buffer.data[p:q].decode("utf-8")
+        if size <= self.intern_max_size:
+            interned = self.interned
+            try:
+                return interned[value]
+            except KeyError:
+                if len(interned) >= self.intern_capacity:
+                    interned.clear()
+                interned[value] = value
+        return value
+
+    def _read_bytes(self, size):
+        buffer = self.unpackable
+        p = buffer.p
+        q = buffer.p = p + size
+        if self.bytes_views:
+            buffer.detach()
+            return _read_only(memoryview(buffer.data)[p:q])
+        with memoryview(buffer.data) as view:
+            return view[p:q].tobytes()
+
+    def _unpack_positive_tiny_int(self, marker):
+        return marker
+
+    def _unpack_negative_tiny_int(self, marker):
+        return marker - 0x100
+
+    def _unpack_null(self, _):
+        return None
+
+    def _unpack_float(self, _):
+        return self._read_struct(FLOAT_64)
+
+    def _unpack_false(self, _):
+        return False
+
+    def _unpack_true(self, _):
+        return True
+
+    def _unpack_int_8(self, _):
+        return self._read_struct(INT_8)
+
+    def _unpack_int_16(self, _):
+        return self._read_struct(INT_16)
+
+    def _unpack_int_32(self, _):
+        return self._read_struct(INT_32)
+
+    def _unpack_int_64(self, _):
+        return self._read_struct(INT_64)
+
+    def _unpack_bytes_8(self, _):
+        return self._read_bytes(self._read_u8())
+
+    def _unpack_bytes_16(self, _):
+        return self._read_bytes(self._read_struct(UINT_16))
+
+    def _unpack_bytes_32(self, _):
+        return self._read_bytes(self._read_struct(UINT_32))
+
+    def _unpack_tiny_string(self, marker):
+        return self._read_string(marker & 0x0F)
+
+    def _unpack_string_8(self, _):
+        return self._read_string(self._read_u8())
+
+    def _unpack_string_16(self, _):
+        return self._read_string(self._read_struct(UINT_16))
+
+    def _unpack_string_32(self, _):
+        return self._read_string(self._read_struct(UINT_32))
+
+    def _unpack_list(self, size):
+        if size >= MIN_VECTOR_SIZE and self.numeric_lists:
+            value = self._unpack_vector(size)
+            if value is not None:
+                return value
+        unpack = self._unpack
+        return [unpack() for _ in range(size)]
+
+    def _unpack_vector(self, size):
+        """ Decode a list of `size` floats, or of `size` integers that all
+        share the same marker byte, in a single vectorised operation. If
+        the list holds anything else, :const:`None` is returned and
+        nothing is consumed.
+        """
+        buffer = self.unpackable
+        data = buffer.data
+        p = buffer.p
+        if p >= buffer.used:
             return None
+        marker = data[p]
+        if marker < 0x80 or marker >= 0xF0:
+            # Tiny integers are their own marker bytes
+            end = p + size
+            if end > buffer.used or data[p:end].translate(None, TINY_INT_MARKERS):
+                return None
+            items = array("b", data[p:end])
+        else:
+            try:
+                type_code = VECTOR_TYPE_CODES[marker]
+            except KeyError:
+                return None
+            items = array(type_code)
+            width = items.itemsize
+            stride = width + 1
+            end = p + stride * size
+            if end > buffer.used or data[p:end:stride] != VECTOR_MARKERS[marker] * size:
+                return None
+            raw = bytearray(width * size)
+            for i in range(width):
+                raw[i::width] = data[p + 1 + i:end:stride]
+            items.frombytes(bytes(raw))
+            if byteorder == "little":
+                items.byteswap()
+        buffer.p = end
+        numeric_lists = self.numeric_lists
+        if numeric_lists == "array":
+            return items
+        elif numeric_lists == "numpy":
+            return numpy.frombuffer(items, dtype=items.typecode)
+        else:
+            return items.tolist()
+
+    def _unpack_tiny_list(self, marker):
+        return self._unpack_list(marker & 0x0F)
+
+    def _unpack_list_8(self, _):
+        return self._unpack_list(self._read_u8())
+
+    def _unpack_list_16(self, _):
+        return self._unpack_list(self._read_struct(UINT_16))
+
+    def _unpack_list_32(self, _):
+        return self._unpack_list(self._read_struct(UINT_32))
+
+    def _unpack_list_stream(self, _):
+        value = []
+        item = self._unpack()
+        while item is not EndOfStream:
+            value.append(item)
+            item = self._unpack()
+        return value
+
+    def _unpack_map_items(self, size):
+        unpack = self._unpack
+        value = {}
+        for _ in range(size):
+            key = unpack()
+            value[key] = unpack()
+        return value
+
+    def _unpack_tiny_map(self, marker):
+        return self._unpack_map_items(marker & 0x0F)
+
+    def _unpack_map_8(self, _):
+        return self._unpack_map_items(self._read_u8())
+
+    def _unpack_map_16(self, _):
+        return self._unpack_map_items(self._read_struct(UINT_16))
+
+    def _unpack_map_32(self, _):
+        return self._unpack_map_items(self._read_struct(UINT_32))
+
+    def _unpack_map_stream(self, _):
+        value = {}
+        key = self._unpack()
+        while key is not EndOfStream:
+            value[key] = self._unpack()
+            key = self._unpack()
+        return value
+
+    def _unpack_structure(self, size):
+        tag = TAGS[self._read_u8()]
+        unpack = self._unpack
+        return self._structure(tag, [unpack() for _ in range(size)])
+
+    def _structure(self, tag, fields):
+        hydration_functions = self.hydration_functions
+        if hydration_functions:
+            try:
+                f = hydration_functions[tag]
+            except KeyError:
+                pass
+            else:
+                return f(*fields)
+        self.structure_count += 1
+        return Structure(tag, *fields)
 
-        # Float
-        elif marker == 0xC1:
-            value, = struct_unpack(">d", self.read(8))
-            return value
+    def _unpack_tiny_structure(self, marker):
+        return self._unpack_structure(marker & 0x0F)
 
-        # Boolean
-        elif marker == 0xC2:
-            return False
-        elif marker == 0xC3:
-            return True
-
-        # Integer
-        elif marker == 0xC8:
-            return struct_unpack(">b", self.read(1))[0]
-        elif marker == 0xC9:
-            return struct_unpack(">h", self.read(2))[0]
-        elif marker == 0xCA:
-            return struct_unpack(">i", self.read(4))[0]
-        elif marker == 0xCB:
-            return struct_unpack(">q", self.read(8))[0]
-
-        # Bytes
-        elif marker == 0xCC:
-            size, = struct_unpack(">B", self.read(1))
-            return self.read(size).tobytes()
-        elif marker == 0xCD:
-            size, = struct_unpack(">H", self.read(2))
-            return self.read(size).tobytes()
-        elif marker == 0xCE:
-            size, = struct_unpack(">I", self.read(4))
-            return self.read(size).tobytes()
+    def _unpack_structure_8(self, _):
+        return self._unpack_structure(self._read_u8())
 
-        else:
-            marker_high = marker & 0xF0
-            # String
-            if marker_high == 0x80:  # TINY_STRING
-                return decode(self.read(marker & 0x0F), "utf-8")
-            elif marker == 0xD0:  # STRING_8:
-                size, = struct_unpack(">B", self.read(1))
-                return decode(self.read(size), "utf-8")
-            elif marker == 0xD1:  # STRING_16:
-                size, = struct_unpack(">H", self.read(2))
-                return decode(self.read(size), "utf-8")
-            elif marker == 0xD2:  # STRING_32:
-                size, = struct_unpack(">I", self.read(4))
-                return decode(self.read(size), "utf-8")
-
-            # List
-            elif 0x90 <= marker <= 0x9F or 0xD4 <= marker <= 0xD7:
-                return list(self._unpack_list_items(marker))
-
-            # Map
-            elif 0xA0 <= marker <= 0xAF or 0xD8 <= marker <= 0xDB:
-                return self._unpack_map(marker)
-
-            # Structure
-            elif 0xB0 <= marker <= 0xBF or 0xDC <= marker <= 0xDD:
-                size, tag = self._unpack_structure_header(marker)
-                value = Structure(tag, *([None] * size))
-                for i in range(len(value)):
-                    value[i] = self._unpack()
-                return value
+    def _unpack_structure_16(self, _):
+        return self._unpack_structure(self._read_struct(UINT_16))
+
+    def _unpack_end_of_stream(self, _):
+        return EndOfStream
 
-            elif marker == 0xDF:  # END_OF_STREAM:
-                return EndOfStream
+    def _unpack_unknown(self, marker):
+        raise ValueError("Unknown PackStream marker %02X" % marker)
 
+    def skip(self):
+        """ Move past the next value, including any values nested within
+        it, using the size information in each header rather than
+        decoding anything.
+        """
+        buffer = self.unpackable
+        data = buffer.data
+        p = buffer.p
+        remaining = 1
+        while remaining:
+            if p >= buffer.used:
+                raise ValueError("Nothing to skip")
+            marker = data[p]
+            p += 1
+            remaining -= 1
+            if marker < 0x80 or marker >= 0xF0:
+                pass
+            elif marker < 0x90:
+                p += marker & 0x0F
+            elif marker < 0xA0:
+                remaining += marker & 0x0F
+            elif marker < 0xB0:
+                remaining += 2 * (marker & 0x0F)
+            elif marker < 0xC0:
+                p += 1
+                remaining += marker & 0x0F
+            elif marker == 0xC0 or marker == 0xC2 or marker == 0xC3:
+                pass
+            elif marker == 0xC1 or marker == 0xCB:
+                p += 8
+            elif marker == 0xC8:
+                p += 1
+            elif marker == 0xC9:
+                p += 2
+            elif marker == 0xCA:
+                p += 4
+            elif marker == 0xCC or marker == 0xD0:
+                p += 1 + data[p]
+            elif marker == 0xCD or marker == 0xD1:
+                p += 2 + UINT_16.unpack_from(data, p)[0]
+            elif marker == 0xCE or marker == 0xD2:
+                p += 4 + UINT_32.unpack_from(data, p)[0]
+            elif marker == 0xD4:
+                remaining += data[p]
+                p += 1
+            elif marker == 0xD5:
+                remaining += UINT_16.unpack_from(data, p)[0]
+                p += 2
+            elif marker == 0xD6:
+                remaining += UINT_32.unpack_from(data, p)[0]
+                p += 4
+            elif marker == 0xD8:
+                remaining += 2 * data[p]
+                p += 1
+            elif marker == 0xD9:
+                remaining += 2 * UINT_16.unpack_from(data, p)[0]
+                p += 2
+            elif marker == 0xDA:
+                remaining += 2 * UINT_32.unpack_from(data, p)[0]
+                p += 4
+            elif marker == 0xDC:
+                remaining += data[p]
+                p += 2
+            elif marker == 0xDD:
+                remaining += UINT_16.unpack_from(data, p)[0]
+                p += 3
+            elif marker == 0xD7 or marker == 0xDB:
+                # Streams carry no size, so are simply decoded
+                buffer.p = p - 1
+                self._unpack()
+                p = buffer.p
             else:
                 raise ValueError("Unknown PackStream marker %02X" % marker)
+        buffer.p = p
+
+    def _read_list_size(self):
+        marker = self._read_u8()
+        if 0x90 <= marker <= 0x9F:
+            return marker & 0x0F
+        elif marker == 0xD4:
+            return self._read_u8()
+        elif marker == 0xD5:
+            return self._read_struct(UINT_16)
+        elif marker == 0xD6:
+            return self._read_struct(UINT_32)
+        else:
+            raise ValueError("Expected list, found marker %02X" % marker)
 
-    def _unpack_list_items(self, marker):
-        marker_high = marker & 0xF0
-        if marker_high == 0x90:
-            size = marker & 0x0F
-            if size == 0:
-                return
-            elif size == 1:
-                yield self._unpack()
-            else:
-                for _ in range(size):
-                    yield self._unpack()
-        elif marker == 0xD4:  # LIST_8:
-            size, = struct_unpack(">B", self.read(1))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD5:  # LIST_16:
-            size, = struct_unpack(">H", self.read(2))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD6:  # LIST_32:
-            size, = struct_unpack(">I", self.read(4))
-            for _ in range(size):
-                yield self._unpack()
-        elif marker == 0xD7:  # LIST_STREAM:
-            item = None
-            while item is not EndOfStream:
-                item = self._unpack()
-                if item is not EndOfStream:
-                    yield item
+    def unpack_record(self, projection=None):
+        """ Unpack the list of values carried by a RECORD message directly
+        into a tuple. If no structures were left unhydrated along the way,
+        the tuple is returned as :class:`neobolt.types.PlainValues`, for
+        which hydration can be skipped.
+
+        If a `projection` of field indexes is given, only those fields
+        are decoded, and returned in that order; all others are skipped.
+        """
+        size = self._read_list_size()
+        structure_count = self.structure_count
+        unpack = self.unpack_iterative
+        if projection is None:
+            values = [unpack() for _ in range(size)]
         else:
-            return
+            skip = self.skip
+            selected = dict.fromkeys(projection)
+            for index in range(size):
+                if index in selected:
+                    selected[index] = unpack()
+                else:
+                    skip()
+            values = [selected[index] for index in projection]
+        if self.structure_count == structure_count:
+            return PlainValues(values)
+        else:
+            return tuple(values)
+
+    def unpack_lazy_record(self):
+        """ Copy the list of values carried by a RECORD message, without
+        decoding it, into a :class:`neobolt.types.LazyRecord` that decodes
+        each value on first access.
+        """
+        buffer = self.unpackable
+        start = buffer.p
+        size = self._read_list_size()
+        offsets = []
+        for _ in range(size):
+            offsets.append(buffer.p - start)
+            self.skip()
+        with memoryview(buffer.data) as view:
+            raw = view[start:buffer.p].tobytes()
+        return LazyRecord(raw, offsets, self.hydration_functions)
 
     def unpack_map(self):
         marker = self.read_u8()
         return self._unpack_map(marker)
 
     def _unpack_map(self, marker):
-        marker_high = marker & 0xF0
-        if marker_high == 0xA0:
-            size = marker & 0x0F
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xD8:  # MAP_8:
-            size, = struct_unpack(">B", self.read(1))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xD9:  # MAP_16:
-            size, = struct_unpack(">H", self.read(2))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xDA:  # MAP_32:
-            size, = struct_unpack(">I", self.read(4))
-            value = {}
-            for _ in range(size):
-                key = self._unpack()
-                value[key] = self._unpack()
-            return value
-        elif marker == 0xDB:  # MAP_STREAM:
-            value = {}
-            key = None
-            while key is not EndOfStream:
-                key = self._unpack()
-                if key is not EndOfStream:
-                    value[key] = self._unpack()
-            return value
+        if 0xA0 <= marker <= 0xAF or 0xD8 <= marker <= 0xDB:
+            return self._handlers[marker](self, marker)
         else:
             return None
 
@@ -276,15 +694,56 @@ class Unpacker(object):
     def _unpack_structure_header(self, marker):
         marker_high = marker & 0xF0
         if marker_high == 0xB0:  # TINY_STRUCT
-            signature = self.read(1).tobytes()
-            return marker & 0x0F, signature
+            return marker & 0x0F, TAGS[self._read_u8()]
         elif marker == 0xDC:  # STRUCT_8:
-            size, = struct_unpack(">B", self.read(1))
-            signature = self.read(1).tobytes()
-            return size, signature
+            size = self._read_u8()
+            return size, TAGS[self._read_u8()]
         elif marker == 0xDD:  # STRUCT_16:
-            size, = struct_unpack(">H", self.read(2))
-            signature = self.read(1).tobytes()
-            return size, signature
+            size = self._read_struct(UINT_16)
+            return size, TAGS[self._read_u8()]
         else:
             raise ValueError("Expected structure, found marker %02X" % marker)
+
+
+def _build_handlers():
+    """ Build the table of handler functions used by the
+    :class:`.Unpacker`, indexed by marker byte.
+    """
+    u = Unpacker
+    handlers = [u._unpack_unknown] * 0x100
+    handlers[0x00:0x80] = [u._unpack_positive_tiny_int] * 0x80
+    handlers[0x80:0x90] = [u._unpack_tiny_string] * 0x10
+    handlers[0x90:0xA0] = [u._unpack_tiny_list] * 0x10
+    handlers[0xA0:0xB0] = [u._unpack_tiny_map] * 0x10
+    handlers[0xB0:0xC0] = [u._unpack_tiny_structure] * 0x10
+    handlers[0xC0] = u._unpack_null
+    handlers[0xC1] = u._unpack_float
+    handlers[0xC2] = u._unpack_false
+    handlers[0xC3] = u._unpack_true
+    handlers[0xC8] = u._unpack_int_8
+    handlers[0xC9] = u._unpack_int_16
+    handlers[0xCA] = u._unpack_int_32
+    handlers[0xCB] = u._unpack_int_64
+    handlers[0xCC] = u._unpack_bytes_8
+    handlers[0xCD] = u._unpack_bytes_16
+    handlers[0xCE] = u._unpack_bytes_32
+    handlers[0xD0] = u._unpack_string_8
+    handlers[0xD1] = u._unpack_string_16
+    handlers[0xD2] = u._unpack_string_32
+    handlers[0xD4] = u._unpack_list_8
+    handlers[0xD5] = u._unpack_list_16
+    handlers[0xD6] = u._unpack_list_32
+    handlers[0xD7] = u._unpack_list_stream
+    handlers[0xD8] = u._unpack_map_8
+    handlers[0xD9] = u._unpack_map_16
+    handlers[0xDA] = u._unpack_map_32
+    handlers[0xDB] = u._unpack_map_stream
+    handlers[0xDC] = u._unpack_structure_8
+    handlers[0xDD] = u._unpack_structure_16
+    handlers[0xDF] = u._unpack_end_of_stream
+    handlers[0xF0:0x100] = [u._unpack_negative_tiny_int] * 0x10
+    return handlers
+
+
+#: Handler functions, indexed by marker byte
+Unpacker._handlers = _build_handlers()
@@ -26,9 +26,14 @@ into concrete values through the PackStreamHydrant.
 """
 
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Mapping, Sequence, KeysView, ValuesView, ItemsView
 from functools import reduce
-from operator import xor as xor_operator
+from operator import length_hint, xor as xor_operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 INT64_MIN = -(2 ** 63)
@@ -66,6 +71,37 @@ class Structure(object):
         self.fields[key] = value
 
 
+class PlainValues(tuple):
+    """ The values of a record, as decoded by the
+    :class:`neobolt.packstream.Unpacker`, that are known to contain no
+    unhydrated PackStream structures and which therefore need no
+    hydration.
+    """
+
+
+class SizedMap(object):
+    """ Lazily-applied map over a source of known length. This allows
+    sized iterables, and generators with a length hint, to be dehydrated
+    and packed item by item, without first being copied into a list.
+    """
+
+    def __init__(self, function, source, size=None):
+        self.function = function
+        self.source = source
+        self.size = len(source) if size is None else size
+        #: Whether the source can only be iterated once
+        self.one_shot = iter(source) is source
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return map(self.function, self.source)
+
+    def __repr__(self):
+        return "<%s size=%d source=%r>" % (self.__class__.__name__, self.size, self.source)
+
+
 class PackStreamHydrator(object):
 
     def __init__(self, protocol_version):
@@ -96,7 +132,18 @@ class PackStreamHydrator(object):
 
     def hydrate(self, values):
         """ Convert PackStream values into native values.
+
+        Values decoded with these :attr:`hydration_functions` passed to
+        the :class:`neobolt.packstream.Unpacker` arrive already hydrated,
+        as :class:`.PlainValues`, and are returned untouched. So too are
+        :class:`.LazyRecord` values that carry hydration functions, which
+        stay lazy; a lazy record without them is decoded in full here, so
+        lazy results should always be given hydration functions.
         """
+        if type(values) is PlainValues:
+            return values
+        if isinstance(values, LazyRecord) and values.hydration_functions is not None:
+            return values
 
         def hydrate_(obj):
             if isinstance(obj, Structure):
@@ -171,14 +218,36 @@ class PackStreamDehydrator(object):
                 return obj
             elif isinstance(obj, str):
                 return obj
-            elif isinstance(obj, (bytes, bytearray)):  # order is important here - bytes must be checked after string
+            elif isinstance(obj, (bytes, bytearray, memoryview)):  # order is important here - bytes must be checked after string
                 return obj
-            elif isinstance(obj, (list, map_type)):
+            elif isinstance(obj, list):
                 return list(map(dehydrate_, obj))
+            elif isinstance(obj, range):
+                # Ranges hold only integers, so need only a bounds check
+                if obj and not (INT64_MIN <= min(obj[0], obj[-1]) and max(obj[0], obj[-1]) <= INT64_MAX):
+                    raise ValueError("Integer out of bounds (64-bit signed integer values only)")
+                return obj
             elif isinstance(obj, dict):
                 if any(not isinstance(key, str) for key in obj.keys()):
                     raise TypeError("Non-string dictionary keys are not supported")
                 return {key: dehydrate_(value) for key, value in obj.items()}
+            elif isinstance(obj, (Sequence, KeysView, ValuesView, ItemsView)):
+                return SizedMap(dehydrate_, obj)
+            elif isinstance(obj, map_type) or (hasattr(obj, "__next__") and hasattr(obj, "__iter__")):
+                size = length_hint(obj, -1)
+                if size < 0:
+                    return list(map(dehydrate_, obj))
+                return SizedMap(dehydrate_, obj, size)
+            elif numpy is not None and isinstance(obj, numpy.generic):
+                return dehydrate_(obj.item())
+            elif numpy is not None and isinstance(obj, numpy.ndarray):
+                if obj.ndim == 0:
+                    return dehydrate_(obj.item())
+                elif obj.dtype.kind in "biuf":
+                    # Numeric arrays are packed directly from their buffers
+                    return obj
+                else:
+                    return list(map(dehydrate_, obj))
             else:
                 raise TypeError(obj)
 
@@ -370,6 +439,78 @@ class Record(tuple, Mapping):
         return dict(self)
 
 
+class LazyRecord(Sequence):
+    """ The values of a record, held as the raw PackStream bytes of the
+    RECORD message's value list along with the offset of each value
+    within those bytes. Each value is decoded the first time it is
+    accessed, and the raw bytes remain available so that a record can be
+    forwarded without being decoded at all. Any `hydration_functions`
+    are applied as each value is decoded.
+    """
+
+    __unset = object()
+
+    def __init__(self, raw, offsets, hydration_functions=None):
+        self.raw = raw
+        self.offsets = tuple(offsets)
+        self.hydration_functions = hydration_functions
+        self.__values = [self.__unset] * len(self.offsets)
+        self.__unpacker = None
+
+    def __repr__(self):
+        return "<%s raw=%r>" % (self.__class__.__name__, self.raw)
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        else:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = self.__values[index]
+        if value is self.__unset:
+            unpacker = self.__unpacker
+            if unpacker is None:
+                unpacker = self.__unpacker = _raw_unpacker(self.raw, self.hydration_functions)
+            unpacker.unpackable.p = self.offsets[index]
+            value = self.__values[index] = unpacker.unpack()
+        return value
+
+    def raw_value(self, index):
+        """ Return the raw PackStream bytes of a single value.
+        """
+        offsets = self.offsets
+        start = offsets[index]
+        index = index % len(offsets)
+        end = offsets[index + 1] if index + 1 < len(offsets) else len(self.raw)
+        return self.raw[start:end]
+
+
+# The packstream package depends on this one, so it is imported on first use
+_unpacker_module = None
+
+
+def _raw_unpacker(raw, hydration_functions=None):
+    """ Create an Unpacker that decodes values from raw PackStream bytes
+    in place.
+    """
+    global _unpacker_module
+    if _unpacker_module is None:
+        from neobolt.packstream import unpacker as _unpacker_module
+    return _unpacker_module.Unpacker(_unpacker_module.UnpackableBuffer(raw, copy=False),
+                                     hydration_functions=hydration_functions)
+
+
 def iter_items(iterable):
     """ Iterate through all items (key-value pairs) within an iterable
     dictionary-like object. If the object has a `keys` method, this is
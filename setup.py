@@ -34,6 +34,9 @@ install_requires = [
     "neotime",
     "pytz",
 ]
+extras_require = {
+    "numpy": ["numpy"],
+}
 classifiers = [
     "Intended Audience :: Developers",
     "License :: OSI Approved :: Apache Software License",
@@ -62,6 +65,7 @@ setup_args = {
     "keywords": "neo4j graph database",
     "url": "https://github.com/neo4j-drivers/neobolt",
     "install_requires": install_requires,
+    "extras_require": extras_require,
     "classifiers": classifiers,
     "packages": packages,
 }
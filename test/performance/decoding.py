@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+# Copyright (c) 2002-2019 "Neo4j,"
+# Neo4j Sweden AB [http://neo4j.com]
+#
+# This file is part of Neo4j.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Compare the recursive and iterative PackStream decoders on nested
+payloads, such as the JSON documents returned by APOC procedures.
+
+    python -m test.performance.decoding
+"""
+
+
+from io import BytesIO
+from timeit import repeat
+
+from neobolt.packstream import Packer, Unpacker, UnpackableBuffer
+
+
+def document(depth, width):
+    """ A JSON-style document of nested maps and lists.
+    """
+    if depth == 0:
+        return {u"id": 1, u"name": u"Alice", u"score": 1.5, u"active": True}
+    return {
+        u"items": [document(depth - 1, width) for _ in range(width)],
+        u"meta": {u"depth": depth, u"tags": [u"a", u"b", u"c"]},
+    }
+
+
+def chain(depth):
+    """ A single value nested inside `depth` lists.
+    """
+    value = 1
+    for _ in range(depth):
+        value = [value]
+    return value
+
+
+PAYLOADS = [
+    ("flat list of 1000 integers", list(range(1000))),
+    ("document, depth 3, width 4", document(3, 4)),
+    ("document, depth 6, width 2", document(6, 2)),
+    ("list of 200 small maps", [document(0, 0) for _ in range(200)]),
+    ("chain of 250 nested lists", chain(250)),
+]
+
+
+def packb(value):
+    stream = BytesIO()
+    Packer(stream).pack(value)
+    return stream.getvalue()
+
+
+def main(number=100):
+    for name, value in PAYLOADS:
+        buffer = UnpackableBuffer(packb(value))
+        unpacker = Unpacker(buffer)
+
+        def recursive():
+            buffer.p = 0
+            return unpacker.unpack()
+
+        def iterative():
+            buffer.p = 0
+            return unpacker.unpack_iterative()
+
+        assert iterative() == value
+        t_iterative = min(repeat(iterative, number=number, repeat=25))
+        try:
+            assert recursive() == value
+        except RuntimeError:
+            # RecursionError, from Python 3.5
+            print("%-28s  recursive  (recursion limit)  iterative %8.1f us" % (
+                name, 1000000 * t_iterative / number))
+            continue
+        t_recursive = min(repeat(recursive, number=number, repeat=25))
+        print("%-28s  recursive %8.1f us  iterative %8.1f us  (%+.0f%%)" % (
+            name, 1000000 * t_recursive / number, 1000000 * t_iterative / number,
+            100 * (t_iterative - t_recursive) / t_recursive))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ from pytest import raises
 from neobolt.direct import connect, Connection
 from neobolt.exceptions import ServiceUnavailable, IncompleteCommitError, \
     DatabaseUnavailableError
+from neobolt.types import LazyRecord
 from test.stub.tools import StubCluster
 
 
@@ -53,7 +54,69 @@ def test_return_1():
             cx.pull_all(on_success=metadata.update, on_records=records.extend)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
+
+
+def test_return_1_prepared():
+    with StubCluster({9001: "v3/return_1.script"}):
+        address = ("127.0.0.1", 9001)
+        with connect(address) as cx:
+            metadata = {}
+            records = []
+            prepared = cx.prepare("RETURN $x")
+            cx.run_prepared(prepared, {"x": 1}, on_success=metadata.update)
+            cx.pull_all(on_success=metadata.update, on_records=records.extend)
+            cx.send_all()
+            cx.fetch_all()
+            assert records == [(1,)]
+
+
+def test_return_selected_columns():
+    with StubCluster({9001: "v3/return_columns.script"}):
+        address = ("127.0.0.1", 9001)
+        with connect(address) as cx:
+            records = []
+            cx.run("RETURN 1 AS a, [2, {b: 3}] AS b, 'three' AS c", {})
+            cx.pull_all(columns=["c", "a"], on_records=records.extend)
+            cx.send_all()
+            cx.fetch_all()
+            assert records == [(u"three", 1), (u"six", 4)]
+
+
+def test_fetch_available():
+    with StubCluster({9001: "v3/return_columns.script"}):
+        address = ("127.0.0.1", 9001)
+        with connect(address) as cx:
+            batches = []
+            metadata = {}
+            cx.run("RETURN 1 AS a, [2, {b: 3}] AS b, 'three' AS c", {})
+            cx.pull_all(on_records=batches.append, on_success=metadata.update)
+            cx.send_all()
+            detail_count = summary_count = 0
+            while cx.responses:
+                detail_delta, summary_delta = cx.fetch_available()
+                detail_count += detail_delta
+                summary_count += summary_delta
+            assert (detail_count, summary_count) == (2, 2)
+            assert 1 <= len(batches) <= 2
+            assert [record for batch in batches for record in batch] == \
+                [(1, [2, {"b": 3}], "three"), (4, [], "six")]
+
+
+def test_return_1_lazy():
+    with StubCluster({9001: "v3/return_1.script"}):
+        address = ("127.0.0.1", 9001)
+        with connect(address) as cx:
+            metadata = {}
+            records = []
+            cx.run("RETURN $x", {"x": 1}, on_success=metadata.update)
+            cx.pull_all(lazy=True, on_success=metadata.update, on_records=records.extend)
+            cx.send_all()
+            cx.fetch_all()
+            record, = records
+            assert isinstance(record, LazyRecord)
+            assert record.raw == b"\x91\x01"
+            assert record[0] == 1
 
 
 def test_return_1_as_read():
@@ -66,7 +129,7 @@ def test_return_1_as_read():
             cx.pull_all(on_success=metadata.update, on_records=records.extend)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
 
 
 def test_return_1_in_tx():
@@ -81,7 +144,7 @@ def test_return_1_in_tx():
             cx.commit(on_success=metadata.update)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
             assert {"fields": ["x"], "bookmark": "bookmark:1"} == metadata
 
 
@@ -97,7 +160,7 @@ def test_return_1_in_tx_as_read():
             cx.commit(on_success=metadata.update)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
             assert {"fields": ["x"], "bookmark": "bookmark:1"} == metadata
 
 
@@ -113,7 +176,7 @@ def test_begin_with_metadata():
             cx.commit(on_success=metadata.update)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
             assert {"fields": ["x"], "bookmark": "bookmark:1"} == metadata
 
 
@@ -129,7 +192,7 @@ def test_begin_with_timeout():
             cx.commit(on_success=metadata.update)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
             assert {"fields": ["x"], "bookmark": "bookmark:1"} == metadata
 
 
@@ -144,7 +207,7 @@ def test_run_with_bookmarks():
             cx.pull_all(on_success=metadata.update, on_records=records.extend)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
 
 
 def test_run_with_metadata():
@@ -158,7 +221,7 @@ def test_run_with_metadata():
             cx.pull_all(on_success=metadata.update, on_records=records.extend)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
 
 
 def test_run_with_timeout():
@@ -172,7 +235,7 @@ def test_run_with_timeout():
             cx.pull_all(on_success=metadata.update, on_records=records.extend)
             cx.send_all()
             cx.fetch_all()
-            assert records == [[1]]
+            assert records == [(1,)]
 
 
 def test_disconnect_on_run():
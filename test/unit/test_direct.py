@@ -21,11 +21,17 @@
 
 from __future__ import print_function
 
+from io import BytesIO
+from socket import socketpair, timeout as SocketTimeout
+from struct import pack as struct_pack
 from unittest import TestCase
 from threading import Thread, Event
 
-from neobolt.direct import Connection, ConnectionPool
-from neobolt.exceptions import ClientError, ServiceUnavailable
+from neobolt.direct import Connection, ConnectionPool, Outbox, Inbox, BufferedSocket, \
+    MIN_RECEIVE_BUFFER_SIZE, _sendmsg_all
+from neobolt.exceptions import ClientError, CypherSyntaxError, ServiceUnavailable
+from neobolt.packstream import Packer
+from neobolt.types import Structure, PackStreamDehydrator
 
 
 class FakeSocket(object):
@@ -38,6 +44,9 @@ class FakeSocket(object):
     def getpeername(self):
         return self.address
 
+    def getsockname(self):
+        return "127.0.0.1", 54321
+
     def sendall(self, data):
         return
 
@@ -71,26 +80,521 @@ def connector(address, **kwargs):
     return QuickConnection(FakeSocket(address))
 
 
+def fake_connection(**config):
+    """ Create a connection over a fake socket, which sends to nowhere.
+    """
+    address = ("127.0.0.1", 7687)
+    return Connection(3, address, FakeSocket(address), **config)
+
+
+def socket_pair(testcase):
+    """ Create a connected pair of sockets, which are closed when the
+    test case is cleaned up.
+    """
+    client, server = socketpair()
+    testcase.addCleanup(client.close)
+    testcase.addCleanup(server.close)
+    return client, server
+
+
 class ConnectionTestCase(TestCase):
 
+    def connection(self, data, **config):
+        """ Create a connection which sends to nowhere and receives the
+        given data.
+        """
+        connection = fake_connection(**config)
+        client, server = socket_pair(self)
+        server.sendall(data)
+        connection.inbox = Inbox(BufferedSocket(client, 64), on_error=connection._set_defunct)
+        return connection
+
     def test_conn_timedout(self):
-        address = ("127.0.0.1", 7687)
-        connection = Connection(1, address, FakeSocket(address),
-                                max_connection_lifetime=0)
+        connection = fake_connection(max_connection_lifetime=0)
         self.assertEqual(connection.timedout(), True)
 
     def test_conn_not_timedout_if_not_enabled(self):
-        address = ("127.0.0.1", 7687)
-        connection = Connection(1, address, FakeSocket(address),
-                                max_connection_lifetime=-1)
+        connection = fake_connection(max_connection_lifetime=-1)
         self.assertEqual(connection.timedout(), False)
 
     def test_conn_not_timedout(self):
-        address = ("127.0.0.1", 7687)
-        connection = Connection(1, address, FakeSocket(address),
-                                max_connection_lifetime=999999999)
+        connection = fake_connection(max_connection_lifetime=999999999)
         self.assertEqual(connection.timedout(), False)
 
+    def test_bad_unpacker_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            fake_connection(numeric_lists="bogus")
+
+    def test_prepared_run_matches_run(self):
+        expected = fake_connection()
+        expected.run(u"RETURN $x", {u"x": 1}, mode=u"r", bookmarks=[u"bookmark:1"], timeout=2)
+        expected.pull_all()
+        connection = fake_connection()
+        prepared = connection.prepare(u"RETURN $x", mode=u"r", bookmarks=[u"bookmark:1"], timeout=2)
+        connection.run_prepared(prepared, {u"x": 1})
+        connection.pull_all()
+        self.assertEqual(connection.outbox.view().tobytes(), expected.outbox.view().tobytes())
+        self.assertEqual(len(connection.responses), 2)
+
+    def test_presized_run_matches_run(self):
+        parameters = {u"ids": list(range(100000)), u"names": [u"Alice", u"Bob"] * 10000}
+        expected = fake_connection()
+        expected.run(u"UNWIND $ids AS id RETURN id", parameters)
+        connection = fake_connection(presize_messages=True)
+        connection.run(u"UNWIND $ids AS id RETURN id", parameters)
+        self.assertEqual(connection.outbox.view().tobytes(), expected.outbox.view().tobytes())
+
+    def test_presizing_leaves_out_referenced_payloads(self):
+        parameters = {u"data": bytes(1000000), u"text": u"A" * 1000000, u"small": b"\x01" * 100,
+                      u"mutable": bytearray(100000)}
+        expected = fake_connection(reference_threshold=65536)
+        expected.run(u"RETURN $data", parameters)
+        connection = fake_connection(reference_threshold=65536, presize_messages=True)
+        connection.run(u"RETURN $data", parameters)
+        self.assertEqual(connection.outbox.reference_count, expected.outbox.reference_count)
+        self.assertEqual(b"".join(connection.outbox.buffers()), b"".join(expected.outbox.buffers()))
+        self.assertLess(len(connection.outbox._data), 2 * 65536)
+
+    def test_constant_messages(self):
+        connection = fake_connection()
+        connection.discard_all()
+        connection.pull_all()
+        connection.commit()
+        connection.rollback()
+        self.assertEqual(connection.outbox.view().tobytes(),
+                         b"\x00\x02\xB0\x2F\x00\x00"
+                         b"\x00\x02\xB0\x3F\x00\x00"
+                         b"\x00\x02\xB0\x12\x00\x00"
+                         b"\x00\x02\xB0\x13\x00\x00")
+
+    def test_lazy_records_cannot_select_columns(self):
+        connection = fake_connection()
+        with self.assertRaises(ValueError):
+            connection.pull_all(lazy=True, columns=[u"x"])
+        self.assertEqual(len(connection.responses), 0)
+
+    def test_failed_packing_leaves_no_partial_message(self):
+        dehydrate = PackStreamDehydrator(3).dehydrate
+        for config in [{}, {"presize_messages": True}]:
+            connection = fake_connection(**config)
+            connection.run(u"RETURN 1")
+            expected = connection.outbox.view().tobytes()
+            with self.assertRaises(TypeError):
+                connection.run(u"RETURN $xs", dehydrate([{u"xs": (1, 2, object())}])[0])
+            prepared = connection.prepare(u"RETURN $xs")
+            with self.assertRaises(TypeError):
+                connection.run_prepared(prepared, dehydrate([{u"xs": iter([1, 2, object()])}])[0])
+            self.assertEqual(connection.outbox.view().tobytes(), expected)
+            self.assertEqual(len(connection.responses), 1)
+
+    def test_fetch_available_batches_records(self):
+        message = InboxTestCase.message
+        connection = self.connection(
+            message(b"\x70", {u"fields": [u"x"]}) + message(b"\x71", [1]) + message(b"\x71", [2]) +
+            message(b"\x70", {u"type": u"r"}))
+        events = []
+        connection.run(u"UNWIND [1, 2] AS x RETURN x")
+        connection.pull_all(on_records=lambda records: events.append(("records", list(records))),
+                            on_success=lambda metadata: events.append(("success", metadata)))
+        connection.send_all()
+        self.assertEqual(connection.fetch_available(), (2, 2))
+        self.assertEqual(events, [("records", [(1,), (2,)]), ("success", {u"type": u"r"})])
+        self.assertEqual(len(connection.responses), 0)
+
+    def test_hydration_error_leaves_connection_usable(self):
+        def hydrate_point(*fields):
+            raise ValueError("Bad point %r" % (fields,))
+
+        message = InboxTestCase.message
+        connection = self.connection(
+            message(b"\x70", {u"fields": [u"p"]}) + message(b"\x71", [Structure(b"X", 1)]) +
+            message(b"\x71", [2]) + message(b"\x70", {}))
+        records = []
+        connection.run(u"RETURN $p AS p")
+        connection.pull_all(hydration_functions={b"X": hydrate_point}, on_records=records.extend)
+        connection.send_all()
+        connection.fetch_message()
+        with self.assertRaises(ValueError):
+            connection.fetch_message()
+        connection.fetch_all()
+        self.assertEqual(records, [(2,)])
+        self.assertEqual(len(connection.responses), 0)
+        self.assertFalse(connection.defunct())
+
+    def test_selected_columns_after_failure(self):
+        message = InboxTestCase.message
+        connection = self.connection(
+            message(b"\x7F", {u"code": u"Neo.ClientError.Statement.SyntaxError",
+                              u"message": u"Invalid input"}) +
+            message(b"\x7E") +
+            message(b"\x70", {}))
+        connection.run(u"RETURN x")
+        connection.pull_all(columns=[u"x"])
+        connection.send_all()
+        with self.assertRaises(CypherSyntaxError):
+            connection.fetch_all()
+        self.assertEqual(len(connection.responses), 0)
+        self.assertFalse(connection.defunct())
+
+    def test_selected_columns_use_fields_of_own_run(self):
+        message = InboxTestCase.message
+        connection = self.connection(
+            message(b"\x70", {u"fields": [u"a", u"b"]}) + message(b"\x71", [1, 2]) + message(b"\x70", {}) +
+            message(b"\x70", {u"fields": [u"b"]}) + message(b"\x71", [3]) + message(b"\x70", {}))
+        records = []
+        connection.run(u"RETURN 1 AS a, 2 AS b")
+        connection.pull_all(columns=[u"b"], on_records=records.extend)
+        connection.run(u"RETURN 3 AS b")
+        connection.pull_all(columns=[u"b"], on_records=records.extend)
+        connection.send_all()
+        connection.fetch_all()
+        self.assertEqual(records, [(2,), (3,)])
+
+    def test_selected_columns_must_be_among_fields(self):
+        message = InboxTestCase.message
+        connection = self.connection(
+            message(b"\x70", {u"fields": [u"a"]}) + message(b"\x71", [1]) + message(b"\x71", [2]) +
+            message(b"\x71", [3]) + message(b"\x70", {}))
+        records = []
+        connection.run(u"UNWIND [1, 2, 3] AS a RETURN a")
+        connection.pull_all(columns=[u"b"], on_records=records.extend, on_success=self.fail)
+        connection.send_all()
+        with self.assertRaises(ValueError):
+            connection.fetch_all()
+        self.assertEqual(records, [])
+        self.assertEqual(len(connection.responses), 0)
+
+
+class OutboxTestCase(TestCase):
+
+    def test_empty_outbox(self):
+        outbox = Outbox()
+        self.assertEqual(outbox.view().tobytes(), b"")
+
+    def test_single_chunk(self):
+        outbox = Outbox()
+        packer = Packer(outbox)
+        packer.pack_struct(b"\x10", (u"RETURN 1", {}, 1.5, 1000000))
+        outbox.chunk()
+        outbox.chunk()
+        self.assertEqual(outbox.view().tobytes(),
+                         b"\x00\x1A\xB4\x10\x88RETURN 1\xA0"
+                         b"\xC1\x3F\xF8\x00\x00\x00\x00\x00\x00"
+                         b"\xCA\x00\x0F\x42\x40\x00\x00")
+
+    def test_values_packed_in_place_are_not_split_across_chunks(self):
+        outbox = Outbox(max_chunk_size=12)
+        packer = Packer(outbox)
+        packer.pack(1)
+        packer.pack(1.5)
+        packer.pack(1.5)
+        outbox.chunk()
+        outbox.chunk()
+        self.assertEqual(outbox.view().tobytes(),
+                         b"\x00\x0A\x01\xC1\x3F\xF8\x00\x00\x00\x00\x00\x00"
+                         b"\x00\x09\xC1\x3F\xF8\x00\x00\x00\x00\x00\x00"
+                         b"\x00\x00")
+
+    def test_large_writes_are_split_across_chunks(self):
+        outbox = Outbox(max_chunk_size=4)
+        outbox.write(b"ABCDEFGHIJ")
+        outbox.chunk()
+        outbox.chunk()
+        self.assertEqual(outbox.view().tobytes(),
+                         b"\x00\x04ABCD\x00\x04EFGH\x00\x02IJ\x00\x00")
+
+    def test_ensure_capacity(self):
+        outbox = Outbox(capacity=16, max_chunk_size=100)
+        packer = Packer(outbox)
+        value = [u"A" * 50, 1.5, list(range(200))]
+        outbox.ensure_capacity(packer.packed_size(value))
+        capacity = len(outbox._data)
+        packer.pack(value)
+        outbox.chunk()
+        outbox.chunk()
+        self.assertEqual(len(outbox._data), capacity)
+
+    def test_rewind(self):
+        outbox = Outbox(capacity=16, max_chunk_size=8, reference_threshold=4)
+        outbox.write(b"\x01\x02")
+        expected = outbox.view().tobytes()
+        mark = outbox.mark()
+        outbox.write(b"\x03\x04\x05")
+        outbox.write(b"ABCDEFGHIJ")
+        outbox.rewind(mark)
+        self.assertEqual(outbox.view().tobytes(), expected)
+        self.assertEqual(outbox.reference_count, 0)
+        outbox.write(b"\x03")
+        self.assertEqual(outbox.view().tobytes(), b"\x00\x03\x01\x02\x03")
+
+    def test_clear(self):
+        outbox = Outbox()
+        outbox.write(b"ABC")
+        outbox.clear()
+        outbox.write(b"DEF")
+        self.assertEqual(outbox.view().tobytes(), b"\x00\x03DEF")
+
+    def test_view_does_not_copy(self):
+        outbox = Outbox()
+        outbox.write(b"ABC")
+        with outbox.view() as view:
+            self.assertIs(view.obj, outbox._data)
+            self.assertEqual(view.tobytes(), b"\x00\x03ABC")
+        self.assertEqual(outbox.flush_count, 1)
+        self.assertEqual(outbox.flush_copied_bytes, 0)
+
+    def test_view_with_references_is_copied(self):
+        outbox = Outbox(reference_threshold=2)
+        outbox.write(b"ABC")
+        self.assertEqual(outbox.view().tobytes(), b"\x00\x03ABC")
+        self.assertEqual(outbox.flush_count, 1)
+        self.assertEqual(outbox.flush_copied_bytes, 5)
+
+    def test_buffer_is_reused(self):
+        outbox = Outbox(capacity=16, shrink_interval=1)
+        outbox.write(b"A" * 20)
+        data = outbox._data
+        outbox.clear()
+        self.assertIs(outbox._data, data)
+
+    def test_buffer_shrinks_after_large_message(self):
+        outbox = Outbox(capacity=16, shrink_interval=4)
+        outbox.write(b"A" * 1000)
+        outbox.clear()
+        for _ in range(3):
+            self.assertGreaterEqual(len(outbox._data), 1000)
+            outbox.write(b"B" * 10)
+            outbox.clear()
+        self.assertEqual(len(outbox._data), 1002)
+        for _ in range(4):
+            outbox.write(b"B" * 10)
+            outbox.clear()
+        self.assertEqual(len(outbox._data), 16)
+
+    def test_buffer_can_shrink_while_viewed(self):
+        outbox = Outbox(capacity=16, shrink_interval=1)
+        outbox.write(b"A" * 1000)
+        outbox.clear()
+        outbox.write(b"B" * 10)
+        with outbox.view() as view:
+            outbox.clear()
+            self.assertEqual(view.tobytes(), b"\x00\x0A" + b"B" * 10)
+        self.assertEqual(len(outbox._data), 16)
+
+    def test_referenced_payloads_match_copies(self):
+        payloads = [b"A" * 10, bytearray(b"B" * 100), memoryview(b"C" * 40000), u"D" * 70]
+        copied = Outbox(max_chunk_size=16384)
+        referenced = Outbox(max_chunk_size=16384, reference_threshold=50)
+        for outbox in (copied, referenced):
+            packer = Packer(outbox)
+            packer.pack_struct(b"\x10", payloads)
+            outbox.chunk()
+            outbox.chunk()
+        self.assertEqual(copied.reference_count, 0)
+        # Only the bytes of the encoded string are referenced
+        self.assertEqual(referenced.reference_count, 1)
+        self.assertEqual(referenced.view().tobytes(), copied.view().tobytes())
+        self.assertEqual(b"".join(referenced.buffers()), copied.view().tobytes())
+
+    def test_referenced_payloads_are_not_copied(self):
+        payload = b"ABCDEFGHIJ"
+        outbox = Outbox(max_chunk_size=4, reference_threshold=8)
+        outbox.write(b"\xCC\x0A")
+        outbox.write(payload)
+        buffers = outbox.buffers()
+        self.assertEqual([bytes(buffer) for buffer in buffers],
+                         [b"\x00\x04\xCC\x0A", b"AB", b"\x00\x04", b"CDEF",
+                          b"\x00\x04", b"GHIJ"])
+        self.assertTrue(all(buffer.obj is payload for buffer in buffers[1::2]))
+
+    def test_mutable_payloads_are_copied(self):
+        outbox = Outbox(reference_threshold=8)
+        packer = Packer(outbox)
+        payload = bytearray(b"ABCDEFGHIJ")
+        packer.pack(payload)
+        with memoryview(payload) as view:
+            packer.pack(view)
+        self.assertEqual(outbox.reference_count, 0)
+        payload.extend(b"K")
+        self.assertEqual(outbox.view().tobytes(), b"\x00\x18" + b"\xCC\x0AABCDEFGHIJ" * 2)
+
+    def test_clear_drops_references(self):
+        outbox = Outbox(reference_threshold=2)
+        outbox.write(b"ABC")
+        outbox.clear()
+        outbox.write(b"D")
+        self.assertEqual(outbox.reference_count, 0)
+        self.assertEqual(outbox.view().tobytes(), b"\x00\x01D")
+
+    def test_sendmsg_all(self):
+        client, server = socket_pair(self)
+        payload = bytes(bytearray(range(256))) * 8192
+        outbox = Outbox(reference_threshold=1024)
+        outbox.write(b"\xCE" + struct_pack(">I", len(payload)))
+        outbox.write(payload)
+        expected = outbox.view().tobytes()
+        received = bytearray()
+
+        def receive():
+            while len(received) < len(expected):
+                received.extend(server.recv(65536))
+
+        thread = Thread(target=receive)
+        thread.start()
+        _sendmsg_all(client, outbox.buffers())
+        thread.join()
+        self.assertEqual(received, expected)
+
+
+class BufferedSocketTestCase(TestCase):
+
+    def buffered_socket(self, capacity=64, **kwargs):
+        client, server = socket_pair(self)
+        return BufferedSocket(client, capacity, **kwargs), server
+
+    def test_receive_counts(self):
+        sock, server = self.buffered_socket()
+        server.sendall(b"\x01\x02\x03\x04")
+        sock.fill(4)
+        self.assertEqual(sock.recv_count, 1)
+        self.assertEqual(sock.recv_bytes, 4)
+        self.assertEqual(sock.bytes_per_recv, 4.0)
+        buffer = bytearray(4)
+        self.assertEqual(sock.recv_into(buffer, 4), 4)
+        self.assertEqual(buffer, b"\x01\x02\x03\x04")
+        self.assertEqual(sock.recv_count, 1)
+
+    def test_no_receives(self):
+        sock, _ = self.buffered_socket()
+        self.assertEqual(sock.bytes_per_recv, 0.0)
+
+    def test_read_timeout(self):
+        sock, server = self.buffered_socket(read_timeout=0.01)
+        server.sendall(b"\x01")
+        with self.assertRaises(SocketTimeout):
+            sock.fill(2)
+
+    def test_fixed_buffer_must_hold_a_chunk(self):
+        with self.assertRaises(ValueError):
+            self.buffered_socket(MIN_RECEIVE_BUFFER_SIZE - 1, fixed=True)
+
+    def test_fixed_buffer_does_not_grow(self):
+        sock, server = self.buffered_socket(MIN_RECEIVE_BUFFER_SIZE, fixed=True)
+        data = bytes(bytearray(range(256))) * 1024
+        thread = Thread(target=server.sendall, args=(data,))
+        thread.start()
+        received = bytearray()
+        buffer = bytearray(50000)
+        while len(received) < len(data):
+            n = sock.recv_into(buffer, min(len(buffer), len(data) - len(received)))
+            received.extend(buffer[:n])
+            self.assertEqual(len(sock.buffer), MIN_RECEIVE_BUFFER_SIZE)
+            self.assertLessEqual(sock.recv_bytes - len(received), MIN_RECEIVE_BUFFER_SIZE)
+        thread.join()
+        self.assertEqual(received, data)
+
+    def test_closed_by_peer(self):
+        sock, server = self.buffered_socket()
+        server.close()
+        with self.assertRaises(OSError):
+            sock.fill(1)
+
+
+class InboxTestCase(TestCase):
+
+    @classmethod
+    def message(cls, signature, *fields, **kwargs):
+        max_chunk_size = kwargs.get("max_chunk_size", 0xFFFF)
+        stream = BytesIO()
+        Packer(stream).pack(Structure(signature, *fields))
+        data = stream.getvalue()
+        chunks = []
+        for start in range(0, len(data), max_chunk_size):
+            chunk = data[start:start + max_chunk_size]
+            chunks.append(struct_pack(">H", len(chunk)) + chunk)
+        return b"".join(chunks) + b"\x00\x00"
+
+    def inbox(self, data, **unpacker_config):
+        client, server = socket_pair(self)
+        server.sendall(data)
+        sock = BufferedSocket(client, 64)
+        return Inbox(sock, on_error=self.fail, **unpacker_config), sock
+
+    def test_single_and_multiple_chunk_messages(self):
+        inbox, _ = self.inbox(self.message(b"\x70", {u"fields": [u"x"]}) +
+                              self.message(b"\x71", [u"A" * 100], max_chunk_size=16) +
+                              self.message(b"\x71", [2]) +
+                              self.message(b"\x71", [list(range(1000))], max_chunk_size=1000) +
+                              self.message(b"\x70", {}))
+        self.assertEqual(next(inbox), ([], b"\x70", {u"fields": [u"x"]}))
+        self.assertEqual(list(next(inbox)[0]), [(u"A" * 100,)])
+        self.assertEqual(list(next(inbox)[0]), [(2,)])
+        self.assertEqual(list(next(inbox)[0]), [(list(range(1000)),)])
+        self.assertEqual(next(inbox), ([], b"\x70", {}))
+
+    def test_message_available(self):
+        data = self.message(b"\x71", [u"A" * 100], max_chunk_size=16) + self.message(b"\x70", {})
+        inbox, sock = self.inbox(data[:-1])
+        self.assertFalse(inbox.message_available())
+        sock.fill(len(data) - 1)
+        self.assertTrue(inbox.message_available())
+        next(inbox)
+        self.assertFalse(inbox.message_available())
+
+    def test_fixed_receive_buffer(self):
+        client, server = socket_pair(self)
+        sock = BufferedSocket(client, MIN_RECEIVE_BUFFER_SIZE, fixed=True)
+        inbox = Inbox(sock, on_error=self.fail)
+        record = self.message(b"\x71", [u"A" * 1000])
+        large = self.message(b"\x71", [u"B" * 200000])
+        data = record * 500 + large + record * 500
+        thread = Thread(target=server.sendall, args=(data,))
+        thread.start()
+        (value,), = next(inbox)[0]
+        self.assertEqual(value, u"A" * 1000)
+        # Reading stops once the buffer is full, leaving the rest to the
+        # network stack
+        self.assertLessEqual(sock.recv_bytes, MIN_RECEIVE_BUFFER_SIZE)
+        for _ in range(499):
+            next(inbox)
+        (value,), = next(inbox)[0]
+        self.assertEqual(value, u"B" * 200000)
+        for _ in range(500):
+            (value,), = next(inbox)[0]
+            self.assertEqual(value, u"A" * 1000)
+        thread.join()
+        self.assertEqual(sock.recv_bytes, len(data))
+        self.assertEqual(len(sock.buffer), MIN_RECEIVE_BUFFER_SIZE)
+
+    def test_hydration_error_does_not_end_stream(self):
+        def hydrate_point(*fields):
+            raise ValueError("Bad point %r" % (fields,))
+
+        for lazy_records in [False, True]:
+            inbox, _ = self.inbox(self.message(b"\x71", [Structure(b"X", 1)]) +
+                                  self.message(b"\x71", [2]) +
+                                  self.message(b"\x70", {}))
+            inbox.hydration_functions = {b"X": hydrate_point}
+            inbox.lazy_records = lazy_records
+            if lazy_records:
+                record, = next(inbox)[0]
+                with self.assertRaises(ValueError):
+                    record[0]
+            else:
+                with self.assertRaises(ValueError):
+                    next(inbox)
+            self.assertEqual(list(next(inbox)[0]), [(2,)])
+            self.assertEqual(next(inbox), ([], b"\x70", {}))
+
+    def test_bytes_views_outlive_receive_buffer(self):
+        inbox, sock = self.inbox(self.message(b"\x71", [bytearray(b"hello")]) +
+                                 self.message(b"\x71", [bytearray(b"world")]), bytes_views=True)
+        (hello,), = next(inbox)[0]
+        self.assertIsNot(hello.obj, sock.buffer)
+        (world,), = next(inbox)[0]
+        self.assertEqual(hello, b"hello")
+        self.assertEqual(world, b"world")
+
 
 class ConnectionPoolTestCase(TestCase):
 
@@ -20,15 +20,21 @@
 
 
 import struct
+from array import array
 from collections import OrderedDict
 from io import BytesIO
 from math import pi
-from unittest import TestCase
+from unittest import TestCase, skipUnless
 from uuid import uuid4
 
-from neobolt.packstream.packer import Packer
+from neobolt.packstream.packer import Packer, StringCache
 from neobolt.packstream.unpacker import UnpackableBuffer, Unpacker
-from neobolt.types import Structure
+from neobolt.types import Structure, PlainValues, LazyRecord
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class PackStreamTestCase(TestCase):
@@ -42,7 +48,7 @@ class PackStreamTestCase(TestCase):
         return stream.getvalue()
 
     @classmethod
-    def assert_packable(cls, value, packed_value):
+    def assert_packable(cls, value, packed_value, unpacked_value=None):
         stream_out = BytesIO()
         packer = Packer(stream_out)
         packer.pack(value)
@@ -52,9 +58,16 @@ class PackStreamTestCase(TestCase):
         except AssertionError:
             raise AssertionError("Packed value %r is %r instead of expected %r" %
                                  (value, packed, packed_value))
+        try:
+            assert packer.packed_size(value) == len(packed_value)
+        except AssertionError:
+            raise AssertionError("Packed size of %r is %r instead of expected %r" %
+                                 (value, packer.packed_size(value), len(packed_value)))
+        if unpacked_value is None:
+            unpacked_value = value
         unpacked = Unpacker(UnpackableBuffer(packed)).unpack()
         try:
-            assert unpacked == value
+            assert unpacked == unpacked_value
         except AssertionError:
             raise AssertionError("Unpacked value %r is not equal to original %r" % (unpacked, value))
 
@@ -147,6 +160,18 @@ class PackStreamTestCase(TestCase):
         b = bytearray(80000)
         self.assert_packable(b, b"\xCE\x00\x01\x38\x80" + b)
 
+    def test_bytes_are_unpacked_as_bytes(self):
+        unpacked = Unpacker(UnpackableBuffer(b"\xCC\x05hello")).unpack()
+        self.assertIsInstance(unpacked, bytes)
+
+    def test_unpacking_from_offset(self):
+        buffer = UnpackableBuffer(b"\xC1" + struct.pack(">d", 1.5) + b"\xD0\x28" + b"A" * 40 + b"\xB1Z\xC9\x04\xD2")
+        unpacker = Unpacker(buffer)
+        self.assertEqual(unpacker.unpack(), 1.5)
+        self.assertEqual(unpacker.unpack(), u"A" * 40)
+        self.assertEqual(unpacker.unpack(), Structure(b"Z", 1234))
+        self.assertEqual(buffer.p, buffer.used)
+
     def test_empty_string(self):
         self.assert_packable(u"", b"\x80")
 
@@ -191,6 +216,108 @@ class PackStreamTestCase(TestCase):
         l = [1] * 80000
         self.assert_packable(l, b"\xD6\x00\x01\x38\x80" + (b"\x01" * 80000))
 
+    def test_float_list(self):
+        l = [float(i) / 3 for i in range(-20, 20)]
+        self.assert_packable(l, b"\xD4\x28" + b"".join(self.packb(x) for x in l))
+
+    def test_short_float_list(self):
+        l = [1.5, 2.5]
+        self.assert_packable(l, b"\x92" + b"".join(self.packb(x) for x in l))
+
+    def test_int_8_list(self):
+        l = [-100, 100] * 20
+        self.assert_packable(l, b"\xD4\x28" + b"\xC8\x9C\xC8\x64" * 20)
+
+    def test_int_16_list(self):
+        l = [1, 1000] * 20
+        self.assert_packable(l, b"\xD4\x28" + b"\xC9\x00\x01\xC9\x03\xE8" * 20)
+
+    def test_int_32_list(self):
+        l = [-1, 100000] * 20
+        self.assert_packable(l, b"\xD4\x28" + b"\xCA\xFF\xFF\xFF\xFF\xCA\x00\x01\x86\xA0" * 20)
+
+    def test_int_64_list(self):
+        l = [0, 2 ** 40] * 20
+        self.assert_packable(l, b"\xD4\x28" + (b"\xCB" + struct.pack(">q", 0) +
+                                                  b"\xCB" + struct.pack(">q", 2 ** 40)) * 20)
+
+    def test_int_list_out_of_range(self):
+        with self.assertRaises(OverflowError):
+            self.packb([1] * 20 + [2 ** 64])
+
+    def test_mixed_number_list(self):
+        l = [1, 1.5] * 20
+        self.assert_packable(l, b"\xD4\x28" + b"".join(self.packb(x) for x in l))
+
+    def test_bool_list(self):
+        l = [True, False] * 20
+        self.assert_packable(l, b"\xD4\x28" + b"\xC3\xC2" * 20)
+
+    def test_tuple(self):
+        self.assert_packable((1, 2, 3), b"\x93\x01\x02\x03", [1, 2, 3])
+
+    def test_range(self):
+        self.assert_packable(range(1000, 1040), self.packb(list(range(1000, 1040))),
+                             list(range(1000, 1040)))
+
+    def test_dict_values(self):
+        d = OrderedDict([(u"A", 1), (u"B", 2)])
+        self.assert_packable(d.values(), b"\x92\x01\x02", [1, 2])
+
+    def test_custom_sized_iterable(self):
+
+        class Things(object):
+
+            def __len__(self):
+                return 3
+
+            def __iter__(self):
+                return iter([1, 2, 3])
+
+        self.assert_packable(Things(), b"\x93\x01\x02\x03", [1, 2, 3])
+
+    def test_sized_iterable_of_wrong_length(self):
+
+        class Things(object):
+
+            def __len__(self):
+                return 4
+
+            def __iter__(self):
+                return iter([1, 2, 3])
+
+        with self.assertRaises(ValueError):
+            self.packb(Things())
+
+    def test_length_hinted_iterator(self):
+        self.assertEqual(self.packb(iter([1, 2, 3])), b"\x93\x01\x02\x03")
+
+    def test_iterator_without_length_hint(self):
+        self.assertEqual(self.packb(x for x in [1, 2, 3]), b"\x93\x01\x02\x03")
+
+    def test_iterator_with_wrong_length_hint(self):
+
+        class Things(object):
+
+            def __init__(self):
+                self.items = iter([1, 2, 3])
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                return next(self.items)
+
+            def __length_hint__(self):
+                return 2
+
+        with self.assertRaises(ValueError):
+            self.packb(Things())
+
+    def test_iterator_size_cannot_be_calculated(self):
+        with self.assertRaises(TypeError):
+            Packer(BytesIO()).packed_size(iter([1, 2, 3]))
+
     def test_nested_lists(self):
         self.assert_packable([[[]]], b"\x91\x91\x90")
 
@@ -273,6 +400,443 @@ class PackStreamTestCase(TestCase):
     def test_tiny_struct(self):
         self.assert_packable(Structure(b"Z", u"A", 1), b"\xB2Z\x81A\x01")
 
+    def test_struct_8(self):
+        fields = list(range(20))
+        self.assert_packable(Structure(b"Z", *fields), b"\xDC\x14Z" + bytes(bytearray(fields)))
+
+    def test_struct_16(self):
+        fields = [0] * 300
+        self.assert_packable(Structure(b"Z", *fields), b"\xDD\x01\x2CZ" + bytes(300))
+
+    def test_header_size_boundaries(self):
+        for size, string_header, list_header, map_header in [
+                (0xFF, b"\xD0\xFF", b"\xD4\xFF", b"\xD8\xFF"),
+                (0x100, b"\xD1\x01\x00", b"\xD5\x01\x00", b"\xD9\x01\x00"),
+                (0xFFFF, b"\xD1\xFF\xFF", b"\xD5\xFF\xFF", b"\xD9\xFF\xFF")]:
+            self.assertEqual(self.packb(u"A" * size), string_header + b"A" * size)
+            self.assertEqual(self.packb([None] * size), list_header + b"\xC0" * size)
+            self.assertEqual(self.packb(dict.fromkeys(range(size)))[:len(map_header)], map_header)
+
+    def test_memoryview(self):
+        self.assert_packable(memoryview(b"hello"), b"\xCC\x05hello")
+
+    def test_unknown_marker(self):
+        for marker in [0xC4, 0xCF, 0xD3, 0xDE, 0xE0, 0xEF]:
+            with self.assertRaises(ValueError):
+                Unpacker(UnpackableBuffer(bytearray([marker]))).unpack()
+
+    def test_nothing_to_unpack(self):
+        with self.assertRaises(ValueError):
+            Unpacker(UnpackableBuffer(b"")).unpack()
+
     def test_illegal_uuid(self):
         with self.assertRaises(ValueError):
             self.assert_packable(uuid4(), b"\xB0XXX")
+
+    def test_int_subclass(self):
+        class Int(int):
+            pass
+        self.assert_packable(Int(1234), b"\xC9\x04\xD2")
+
+    def test_str_subclass(self):
+        class Str(str):
+            pass
+        self.assert_packable(Str(u"hello"), b"\x85hello")
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            self.packb(object())
+
+
+class RecordTestCase(TestCase):
+
+    def test_scalar_record(self):
+        packed = PackStreamTestCase.packb([1, u"Alice", [1.5, {u"x": None}]])
+        values = Unpacker(UnpackableBuffer(packed)).unpack_record()
+        self.assertIs(type(values), PlainValues)
+        self.assertEqual(values, (1, u"Alice", [1.5, {u"x": None}]))
+
+    def test_record_with_structure(self):
+        packed = PackStreamTestCase.packb([1, [Structure(b"N", 1, [], {})]])
+        values = Unpacker(UnpackableBuffer(packed)).unpack_record()
+        self.assertIs(type(values), tuple)
+        self.assertEqual(values, (1, [Structure(b"N", 1, [], {})]))
+
+    def test_empty_record(self):
+        values = Unpacker(UnpackableBuffer(b"\x90")).unpack_record()
+        self.assertEqual(values, ())
+
+    def test_lazy_record(self):
+        values = [1, u"Alice", [1.5, {u"x": None}], Structure(b"N", 1, [], {})]
+        packed = PackStreamTestCase.packb(values)
+        buffer = UnpackableBuffer(packed)
+        record = Unpacker(buffer).unpack_lazy_record()
+        self.assertEqual(buffer.p, len(packed))
+        self.assertIsInstance(record, LazyRecord)
+        self.assertEqual(len(record), 4)
+        self.assertEqual(record.raw, packed)
+        self.assertEqual(record.raw_value(1), b"\x85Alice")
+        self.assertEqual(record.raw_value(-1), PackStreamTestCase.packb(values[-1]))
+        self.assertEqual(record[2], [1.5, {u"x": None}])
+        self.assertIs(record[2], record[2])
+        self.assertEqual(record[-1], Structure(b"N", 1, [], {}))
+        self.assertEqual(record[1:3], [u"Alice", [1.5, {u"x": None}]])
+        self.assertEqual(record, values)
+
+    def test_record_projection(self):
+        packed = PackStreamTestCase.packb([1, [2, {u"b": 3}], Structure(b"N", 1), u"four"])
+        buffer = UnpackableBuffer(packed)
+        unpacker = Unpacker(buffer)
+        values = unpacker.unpack_record((3, 0))
+        self.assertEqual(values, (u"four", 1))
+        self.assertIsInstance(values, PlainValues)
+        self.assertEqual(unpacker.structure_count, 0)
+        self.assertEqual(buffer.p, len(packed))
+
+    def test_record_must_be_list(self):
+        with self.assertRaises(ValueError):
+            Unpacker(UnpackableBuffer(b"\xA0")).unpack_record()
+
+
+class SkipTestCase(TestCase):
+
+    def assert_skippable(self, value):
+        packed = PackStreamTestCase.packb(value, u"after")
+        unpacker = Unpacker(UnpackableBuffer(packed))
+        unpacker.skip()
+        self.assertEqual(unpacker.unpack(), u"after")
+
+    def test_scalars(self):
+        for value in [None, True, False, 1, -1, 127, -128, 1000, 100000, 2 ** 40, 1.5]:
+            self.assert_skippable(value)
+
+    def test_strings(self):
+        for size in [0, 5, 40, 40000, 80000]:
+            self.assert_skippable(u"A" * size)
+
+    def test_bytes(self):
+        for size in [0, 5, 40000, 80000]:
+            self.assert_skippable(bytearray(size))
+
+    def test_lists(self):
+        for size in [0, 5, 40, 40000, 80000]:
+            self.assert_skippable([u"A"] * size)
+
+    def test_maps(self):
+        for size in [0, 5, 40, 40000]:
+            self.assert_skippable({u"A%d" % i: [i] for i in range(size)})
+
+    def test_structures(self):
+        self.assert_skippable(Structure(b"N", 1, [u"Person"], {u"name": u"Alice"}))
+        self.assert_skippable(Structure(b"Z", *range(20)))
+
+    def test_nested(self):
+        self.assert_skippable([{u"a": [[1, 2], {u"b": Structure(b"X", [3.5])}]}, [], {}])
+
+    def test_streams(self):
+        packed = b"\xD7\x01\xDB\x81A\x02\xDF\xDF\x85after"
+        unpacker = Unpacker(UnpackableBuffer(packed))
+        unpacker.skip()
+        self.assertEqual(unpacker.unpack(), u"after")
+
+    def test_nothing_to_skip(self):
+        with self.assertRaises(ValueError):
+            Unpacker(UnpackableBuffer(b"\x92\x01")).skip()
+
+
+class IterativeUnpackingTestCase(TestCase):
+
+    def assert_same_as_recursive(self, packed):
+        recursive = Unpacker(UnpackableBuffer(packed))
+        iterative = Unpacker(UnpackableBuffer(packed))
+        value = iterative.unpack_iterative()
+        self.assertEqual(value, recursive.unpack())
+        self.assertEqual(iterative.unpackable.p, recursive.unpackable.p)
+        self.assertEqual(iterative.structure_count, recursive.structure_count)
+        return value
+
+    def test_scalars(self):
+        for value in [None, True, False, 1, -1, 127, -128, 1000, 2 ** 40, 1.5,
+                      u"", u"Alice", u"A" * 40000, bytearray(b"\x01\x02")]:
+            self.assertEqual(self.assert_same_as_recursive(PackStreamTestCase.packb(value)), value)
+
+    def test_containers(self):
+        for value in [[], {}, [1, u"a", [], {}], {u"a": {u"b": [1, {u"c": []}]}},
+                      [u"A"] * 40000, {u"A%d" % i: [i] for i in range(300)},
+                      Structure(b"N", 1, [u"Person"], {u"name": u"Alice"}),
+                      [Structure(b"Z"), Structure(b"Z", *range(20))]]:
+            self.assertEqual(self.assert_same_as_recursive(PackStreamTestCase.packb(value)), value)
+
+    def test_streams(self):
+        value = self.assert_same_as_recursive(b"\xD7\x01\xDB\x81A\x02\x81B\xD7\xDF\xDF\x90\xDF")
+        self.assertEqual(value, [1, {u"A": 2, u"B": []}, []])
+
+    def test_hydration(self):
+        packed = PackStreamTestCase.packb([Structure(b"N", 1), Structure(b"?", 2)])
+        unpacker = Unpacker(UnpackableBuffer(packed), hydration_functions={b"N": lambda n: -n})
+        self.assertEqual(unpacker.unpack_iterative(), [-1, Structure(b"?", 2)])
+        self.assertEqual(unpacker.structure_count, 1)
+
+    def test_deep_nesting(self):
+        depth = 100000
+        unpacker = Unpacker(UnpackableBuffer(b"\x91" * depth + b"\x01"))
+        value = unpacker.unpack_iterative()
+        for _ in range(depth):
+            value, = value
+        self.assertEqual(value, 1)
+
+    def test_nothing_to_unpack(self):
+        with self.assertRaises(ValueError):
+            Unpacker(UnpackableBuffer(b"\x92\x01")).unpack_iterative()
+
+
+class BytesViewTestCase(TestCase):
+
+    def test_bytes_are_copied_by_default(self):
+        packed = PackStreamTestCase.packb(bytearray(b"hello"))
+        value = Unpacker(UnpackableBuffer(packed)).unpack()
+        self.assertIsInstance(value, bytes)
+        self.assertEqual(value, b"hello")
+
+    def test_bytes_views(self):
+        value = bytearray(range(256)) * 1000
+        packed = PackStreamTestCase.packb([value, bytearray(b"hello")])
+        buffer = UnpackableBuffer()
+        buffer.ensure_capacity(len(packed))
+        buffer.data[:len(packed)] = packed
+        buffer.used = len(packed)
+        data = buffer.data
+        unpacker = Unpacker(buffer, bytes_views=True)
+        big, small = unpacker.unpack()
+        self.assertIsInstance(big, memoryview)
+        self.assertEqual(big, value)
+        self.assertEqual(small, b"hello")
+        self.assertIs(big.obj, data)
+        self.assertTrue(buffer.detached)
+        # The next message is received into fresh storage
+        unpacker.reset()
+        self.assertIsNot(buffer.data, data)
+        self.assertFalse(buffer.detached)
+        buffer.data[:7] = PackStreamTestCase.packb(bytearray(b"world"))
+        buffer.used = 7
+        self.assertEqual(unpacker.unpack(), b"world")
+        self.assertEqual(small, b"hello")
+
+    @skipUnless(hasattr(memoryview, "toreadonly"), "Read-only views require Python 3.8")
+    def test_bytes_views_are_read_only(self):
+        packed = PackStreamTestCase.packb(bytearray(b"hello"))
+        value = Unpacker(UnpackableBuffer(packed), bytes_views=True).unpack()
+        self.assertTrue(value.readonly)
+
+    def test_buffer_is_reused_without_views(self):
+        buffer = UnpackableBuffer(PackStreamTestCase.packb(bytearray(b"hello")))
+        data = buffer.data
+        Unpacker(buffer).unpack()
+        buffer.reset()
+        self.assertIs(buffer.data, data)
+
+
+class InterningTestCase(TestCase):
+
+    def test_repeated_strings_are_shared(self):
+        packed = PackStreamTestCase.packb([{u"name": u"Alice"}, {u"name": u"Bob"}])
+        first, second = Unpacker(UnpackableBuffer(packed)).unpack()
+        key_1, = first.keys()
+        key_2, = second.keys()
+        self.assertIs(key_1, key_2)
+
+    def test_long_strings_are_not_interned(self):
+        packed = PackStreamTestCase.packb([u"A" * 40, u"A" * 40])
+        unpacker = Unpacker(UnpackableBuffer(packed), intern_max_size=32)
+        first, second = unpacker.unpack()
+        self.assertIsNot(first, second)
+        self.assertEqual(unpacker.interned, {})
+
+    def test_table_is_bounded(self):
+        packed = PackStreamTestCase.packb([u"A", u"B", u"C", u"D", u"E"])
+        unpacker = Unpacker(UnpackableBuffer(packed), intern_capacity=2)
+        self.assertEqual(unpacker.unpack(), [u"A", u"B", u"C", u"D", u"E"])
+        self.assertLessEqual(len(unpacker.interned), 2)
+
+    def test_interning_can_be_disabled(self):
+        packed = PackStreamTestCase.packb([u"hello", u"hello"])
+        unpacker = Unpacker(UnpackableBuffer(packed), intern_capacity=0)
+        first, second = unpacker.unpack()
+        self.assertIsNot(first, second)
+        self.assertEqual(unpacker.interned, {})
+
+
+class StringCacheTestCase(TestCase):
+
+    def test_cached_strings_are_packed_identically(self):
+        cache = StringCache(max_length=300)
+        for value in [u"", u"hello", u"héllö", u"A" * 40, u"A" * 300, {u"name": u"Alice"}]:
+            stream = BytesIO()
+            Packer(stream, string_cache=cache).pack(value)
+            self.assertEqual(stream.getvalue(), PackStreamTestCase.packb(value))
+
+    def test_hits_and_misses(self):
+        cache = StringCache()
+        packer = Packer(BytesIO(), string_cache=cache)
+        packer.pack([{u"id": 1, u"name": u"Alice"}, {u"id": 2, u"name": u"Bob"}])
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.hits, 2)
+
+    def test_long_strings_are_not_cached(self):
+        cache = StringCache(max_length=4)
+        packer = Packer(BytesIO(), string_cache=cache)
+        packer.pack(u"hello")
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.misses, 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = StringCache(capacity=2)
+        cache.packed(u"A")
+        cache.packed(u"B")
+        cache.packed(u"A")
+        cache.packed(u"C")
+        self.assertEqual(len(cache), 2)
+        cache.packed(u"A")
+        self.assertEqual(cache.hits, 2)
+        cache.packed(u"B")
+        self.assertEqual(cache.misses, 4)
+
+
+class NumericListTestCase(TestCase):
+
+    def unpack_all(self, value, numeric_lists):
+        packed = PackStreamTestCase.packb(value)
+        unpacked = []
+        for method in (Unpacker.unpack, Unpacker.unpack_iterative):
+            buffer = UnpackableBuffer(packed)
+            unpacked.append(method(Unpacker(buffer, numeric_lists=numeric_lists)))
+            self.assertEqual(buffer.p, len(packed))
+        return unpacked
+
+    def test_float_list(self):
+        value = [i / 7.0 for i in range(-50, 50)]
+        for unpacked in self.unpack_all(value, "list"):
+            self.assertIsInstance(unpacked, list)
+            self.assertEqual(unpacked, value)
+
+    def test_float_array(self):
+        value = [i / 7.0 for i in range(-50, 50)]
+        for unpacked in self.unpack_all(value, "array"):
+            self.assertIsInstance(unpacked, array)
+            self.assertEqual(unpacked.typecode, "d")
+            self.assertEqual(unpacked.tolist(), value)
+
+    def test_integer_arrays(self):
+        for value in [list(range(-16, 100)), list(range(-128, 0)),
+                      list(range(-30000, 30000, 1000)), list(range(0, 2 ** 30, 2 ** 24)),
+                      list(range(-2 ** 62, 2 ** 62, 2 ** 57))]:
+            for unpacked in self.unpack_all(value, "array"):
+                self.assertIsInstance(unpacked, array)
+                self.assertEqual(unpacked.tolist(), value)
+
+    def test_nested_float_lists(self):
+        value = {u"embeddings": [[float(i)] * 20 for i in range(3)]}
+        for unpacked in self.unpack_all(value, "array"):
+            self.assertEqual([row.tolist() for row in unpacked[u"embeddings"]],
+                             value[u"embeddings"])
+
+    def test_mixed_lists_are_unpacked_item_by_item(self):
+        for value in [[1.5] * 20 + [1], [1.5] * 20 + [None], [1] * 20 + [1.5],
+                      [1000] * 20 + [u"A"], [u"A"] * 20]:
+            for unpacked in self.unpack_all(value, "array"):
+                self.assertIsInstance(unpacked, list)
+                self.assertEqual(unpacked, value)
+
+    def test_short_lists_are_unpacked_item_by_item(self):
+        for unpacked in self.unpack_all([1.5] * 15, "array"):
+            self.assertIsInstance(unpacked, list)
+
+    def test_disabled_by_default(self):
+        for unpacked in self.unpack_all([1.5] * 20, None):
+            self.assertIsInstance(unpacked, list)
+
+    def test_truncated_list(self):
+        packed = PackStreamTestCase.packb([1.5] * 20)[:-1]
+        with self.assertRaises(Exception):
+            Unpacker(UnpackableBuffer(packed), numeric_lists="array").unpack()
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            Unpacker(UnpackableBuffer(), numeric_lists="tuple")
+
+
+@skipUnless(numpy, "NumPy is not installed")
+class NumPyTestCase(TestCase):
+
+    packb = PackStreamTestCase.packb
+
+    @classmethod
+    def assert_array_packable(cls, value, packed_value):
+        stream_out = BytesIO()
+        packer = Packer(stream_out)
+        packer.pack(value)
+        packed = stream_out.getvalue()
+        assert packed == packed_value, "Packed value %r is %r instead of expected %r" % (value, packed, packed_value)
+        assert packer.packed_size(value) == len(packed_value)
+        unpacked = Unpacker(UnpackableBuffer(packed)).unpack()
+        if isinstance(value, numpy.ndarray) and value.dtype == numpy.uint8:
+            assert unpacked == value.tobytes()
+        else:
+            assert numpy.array_equal(unpacked, value)
+
+    def test_float_array(self):
+        a = numpy.linspace(-1.0, 1.0, 40)
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_float_32_array(self):
+        a = numpy.linspace(-1.0, 1.0, 40, dtype=numpy.float32)
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_empty_float_array(self):
+        self.assert_array_packable(numpy.array([], dtype=float), b"\x90")
+
+    def test_tiny_int_array(self):
+        a = numpy.arange(-16, 24)
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_int_16_array(self):
+        a = numpy.array([1, 1000] * 20, dtype=numpy.int32)
+        self.assert_array_packable(a, b"\xD4\x28" + b"\xC9\x00\x01\xC9\x03\xE8" * 20)
+
+    def test_uint_64_array_out_of_range(self):
+        with self.assertRaises(OverflowError):
+            self.packb(numpy.array([2 ** 64 - 1], dtype=numpy.uint64))
+
+    def test_bool_array(self):
+        self.assert_array_packable(numpy.array([True, False]), b"\x92\xC3\xC2")
+
+    def test_uint_8_array_as_bytes(self):
+        a = numpy.frombuffer(b"hello", dtype=numpy.uint8)
+        self.assert_array_packable(a, b"\xCC\x05hello")
+
+    def test_non_contiguous_array(self):
+        a = numpy.arange(40)[::2]
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_2d_array(self):
+        a = numpy.array([[1.5, 2.5], [3.5, 4.5]])
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_string_array(self):
+        a = numpy.array([u"hello", u"world"])
+        self.assert_array_packable(a, self.packb(a.tolist()))
+
+    def test_scalars(self):
+        self.assert_array_packable(numpy.int64(1234), b"\xC9\x04\xD2")
+        self.assert_array_packable(numpy.float32(1.5), b"\xC1" + struct.pack(">d", 1.5))
+        self.assert_array_packable(numpy.bool_(True), b"\xC3")
+
+    def test_numeric_lists(self):
+        for value, dtype in [(numpy.linspace(-1.0, 1.0, 40), numpy.float64),
+                             (numpy.arange(-16, 100), numpy.int8),
+                             (numpy.arange(0, 2 ** 40, 2 ** 34), numpy.int64)]:
+            buffer = UnpackableBuffer(self.packb(value))
+            unpacked = Unpacker(buffer, numeric_lists="numpy").unpack()
+            self.assertIsInstance(unpacked, numpy.ndarray)
+            self.assertEqual(unpacked.dtype, dtype)
+            self.assertTrue(numpy.array_equal(unpacked, value))
@@ -19,11 +19,18 @@
 # limitations under the License.
 
 
-from unittest import TestCase
+from io import BytesIO
+from unittest import TestCase, skipUnless
 
-from neobolt.types import Structure, PackStreamHydrator
+from neobolt.packstream import Packer, Unpacker, UnpackableBuffer
+from neobolt.types import Structure, PackStreamHydrator, PackStreamDehydrator, SizedMap, PlainValues
 from neobolt.types.graph import Node, Path, Graph
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class NodeTestCase(TestCase):
 
@@ -169,6 +176,10 @@ class HydrationTestCase(TestCase):
         self.assertEqual(set(alice.keys()), {"name"})
         self.assertEqual(alice.get("name"), "Alice")
 
+    def test_plain_values_are_not_hydrated(self):
+        values = PlainValues([1, [2, 3], {"name": "Alice"}])
+        self.assertIs(self.hydrant.hydrate(values), values)
+
     def test_hydrating_unknown_structure_returns_same(self):
         struct = Structure(b'?', "foo")
         mystery, = self.hydrant.hydrate([struct])
@@ -195,6 +206,127 @@ class HydrationTestCase(TestCase):
         self.assertEqual(alice.get("name"), "Alice")
 
 
+class DehydrationTestCase(TestCase):
+
+    def setUp(self):
+        self.dehydrant = PackStreamDehydrator(2)
+
+    def test_can_dehydrate_memoryview(self):
+        view = memoryview(b"hello")
+        value, = self.dehydrant.dehydrate([view])
+        self.assertIs(value, view)
+
+    def test_ranges_are_passed_through(self):
+        ids = range(500000)
+        value, = self.dehydrant.dehydrate([ids])
+        self.assertIs(value, ids)
+
+    def test_range_out_of_bounds(self):
+        with self.assertRaises(ValueError):
+            self.dehydrant.dehydrate([range(2 ** 64, 2 ** 64 + 1)])
+
+    def test_sized_iterables_are_dehydrated_lazily(self):
+        for source in [(1, 2, 3), {"a": 1, "b": 2, "c": 3}.values()]:
+            value, = self.dehydrant.dehydrate([source])
+            self.assertIsInstance(value, SizedMap)
+            self.assertEqual(len(value), 3)
+            self.assertEqual(list(value), list(source))
+            self.assertFalse(value.one_shot)
+
+    def test_length_hinted_iterators_are_dehydrated_lazily(self):
+        value, = self.dehydrant.dehydrate([iter([1, 2, 3])])
+        self.assertIsInstance(value, SizedMap)
+        self.assertEqual(len(value), 3)
+        self.assertTrue(value.one_shot)
+        self.assertEqual(list(value), [1, 2, 3])
+
+    def test_sized_map_repr(self):
+        value, = self.dehydrant.dehydrate([(1, 2, 3)])
+        self.assertEqual(repr(value), "<SizedMap size=3 source=(1, 2, 3)>")
+
+    def test_generators_are_collected(self):
+        value, = self.dehydrant.dehydrate([(x for x in [1, 2, 3])])
+        self.assertEqual(value, [1, 2, 3])
+
+    @skipUnless(numpy, "NumPy is not installed")
+    def test_can_dehydrate_numpy_scalars(self):
+        values = self.dehydrant.dehydrate([numpy.int64(1), numpy.float32(1.5), numpy.bool_(True)])
+        self.assertEqual(values, (1, 1.5, True))
+        self.assertEqual(list(map(type, values)), [int, float, bool])
+
+    @skipUnless(numpy, "NumPy is not installed")
+    def test_numeric_numpy_arrays_are_passed_through(self):
+        array = numpy.arange(10)
+        value, = self.dehydrant.dehydrate([array])
+        self.assertIs(value, array)
+
+    @skipUnless(numpy, "NumPy is not installed")
+    def test_can_dehydrate_numpy_string_array(self):
+        value, = self.dehydrant.dehydrate([numpy.array([u"hello", u"world"])])
+        self.assertEqual(value, [u"hello", u"world"])
+
+
+class FusedHydrationTestCase(TestCase):
+
+    def setUp(self):
+        self.hydrant = PackStreamHydrator(2)
+
+    def unpack_record(self, *values):
+        stream = BytesIO()
+        Packer(stream).pack(list(values))
+        unpacker = Unpacker(UnpackableBuffer(stream.getvalue()),
+                            hydration_functions=self.hydrant.hydration_functions)
+        return unpacker.unpack_record()
+
+    def test_can_hydrate_while_unpacking(self):
+        struct = Structure(b'N', 123, ["Person"], {"name": "Alice"})
+        values = self.unpack_record(1, [struct], {"foo": struct})
+        self.assertIsInstance(values, PlainValues)
+        self.assertIs(self.hydrant.hydrate(values), values)
+        one, (alice_in_list,), alice_in_dict = values
+        self.assertEqual(one, 1)
+        self.assertIs(alice_in_list, alice_in_dict["foo"])
+        self.assertEqual(alice_in_list.id, 123)
+        self.assertEqual(alice_in_list.labels, {"Person"})
+        self.assertEqual(alice_in_list.get("name"), "Alice")
+
+    def test_can_hydrate_nested_structures(self):
+        alice = Structure(b'N', 1, ["Person"], {})
+        bob = Structure(b'N', 2, ["Person"], {})
+        knows = Structure(b'r', 9, "KNOWS", {})
+        path, = self.unpack_record(Structure(b'P', [alice, bob], [knows], [1, 1]))
+        self.assertIsInstance(path, Path)
+        self.assertEqual(path.start_node.id, 1)
+        self.assertEqual(path.end_node.id, 2)
+        self.assertEqual(path.relationships[0].type, "KNOWS")
+
+    def test_can_hydrate_temporal_values(self):
+        dt, = self.unpack_record(Structure(b'd', 1539344261, 474716862))
+        self.assertEqual((dt.year, dt.month, dt.day), (2018, 10, 12))
+
+    def test_lazy_records_are_not_decoded_by_hydration(self):
+        hydrated = []
+        hydration_functions = dict(self.hydrant.hydration_functions)
+        hydrate_node = hydration_functions[b"N"]
+        hydration_functions[b"N"] = lambda *fields: hydrated.append(fields) or hydrate_node(*fields)
+        stream = BytesIO()
+        Packer(stream).pack([Structure(b'N', 1, ["Person"], {}), Structure(b'N', 2, ["Person"], {})])
+        record = Unpacker(UnpackableBuffer(stream.getvalue()),
+                          hydration_functions=hydration_functions).unpack_lazy_record()
+        self.assertIs(self.hydrant.hydrate(record), record)
+        self.assertEqual(hydrated, [])
+        self.assertEqual(record[1].id, 2)
+        self.assertEqual(record[0].id, 1)
+        self.assertIs(record[1], record[1])
+        self.assertEqual(len(hydrated), 2)
+
+    def test_unknown_structure_is_left_for_hydration(self):
+        struct = Structure(b'?', "foo")
+        values = self.unpack_record(struct)
+        self.assertNotIsInstance(values, PlainValues)
+        self.assertEqual(self.hydrant.hydrate(values), (struct,))
+
+
 class TemporalHydrationTestCase(TestCase):
 
     def setUp(self):